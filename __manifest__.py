@@ -39,6 +39,8 @@
         'data/farm_sequence.xml',
         'data/crop_sequence.xml',
         'data/product_category_data.xml',
+        'data/farm_cron.xml',
+        'data/farm_project_kpi_data.xml',
         'views/farm_views.xml',
         'views/field_views.xml',
         'views/crop_views.xml',
@@ -46,8 +48,11 @@
         'views/crop_bom_views.xml',
         'views/daily_report_views.xml',
         'views/cost_analysis_views.xml',
+        'views/farm_perf_sample_views.xml',
         'views/res_config_settings_views.xml',
         'views/farm_stock_views.xml',
+        'views/farm_job_views.xml',
+        'views/farm_project_kpi_views.xml',
         'views/farm_menu.xml',
     ],
     'demo': [],
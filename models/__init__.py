@@ -3,10 +3,18 @@ from . import field
 from . import crop
 from . import cultivation_project
 from . import crop_bom
+from . import farm_perf_sample
+from . import cost_resolver
+from . import report_reconciler
 from . import daily_report
 from . import cost_analysis
 from . import bom_apply_wizard
+from . import product
 from . import stock
 from . import res_config_settings
 from . import sale
 from . import account_move
+from . import purchase
+from . import farm_job
+from . import farm_notice
+from . import project_kpi
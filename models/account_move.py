@@ -1,4 +1,4 @@
-from odoo import fields, models, _
+from odoo import api, fields, models, _
 
 
 class AccountMove(models.Model):
@@ -19,3 +19,44 @@ class AccountMove(models.Model):
         if self.daily_report_id:
             result += _(" (Farm Report: %s)") % self.daily_report_id.name
         return result
+
+
+class FarmBillAccountResolver(models.AbstractModel):
+    """Resolve the expense account and taxes of vendor bill lines.
+
+    Results are memoized per transaction and keyed by (product, company), so a
+    billing batch reads the product and category properties once per product.
+    """
+    _name = 'farm.bill.account.resolver'
+    _inherit = 'farm.transaction.memo'
+    _description = 'Farm Vendor Bill Account Resolver'
+
+    @api.model
+    def _preload(self, products, company):
+        """Resolve the accounts and taxes of all products of a billing batch"""
+        memo = self._get_memo()
+        products = products.filtered(lambda p: (p.id, company.id) not in memo)
+        if not products:
+            return
+        # Reading the company-dependent fields on the whole recordset fetches them in batch
+        products = products.with_company(company)
+        default_account = self.env['ir.default'].sudo()._get(
+            'product.category', 'property_account_expense_categ_id', company_id=company.id)
+        for product in products:
+            account = (
+                product.property_account_expense_id or
+                product.categ_id.property_account_expense_categ_id
+            )
+            memo[(product.id, company.id)] = (
+                account.id or default_account or False,
+                product.supplier_taxes_id.ids,
+            )
+
+    @api.model
+    def _resolve(self, product, company):
+        """Return (expense account id, supplier tax ids) of product in company"""
+        key = (product.id, company.id)
+        memo = self._get_memo()
+        if key not in memo:
+            self._preload(product, company)
+        return memo[key]
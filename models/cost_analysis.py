@@ -1,5 +1,6 @@
 from odoo import fields, models, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index
 
 
 class CostAnalysis(models.Model):
@@ -107,6 +108,11 @@ class CostAnalysis(models.Model):
     budget_variance = fields.Float(string='Budget Variance %', compute='_compute_budget_variance', 
                                store=True)
     
+    def init(self):
+        """Index cost lines by source, to find the lines created from a record"""
+        create_index(self.env.cr, 'farm_cost_analysis_source_index', self._table,
+                     ['source_type', 'source_id'])
+
     def _get_cost_effectiveness(self):
         """Return selection options for cost effectiveness with proper translations"""
         return [
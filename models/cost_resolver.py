@@ -0,0 +1,146 @@
+from odoo import models, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class FarmTransactionMemo(models.AbstractModel):
+    """Per-transaction memo shared by the farm resolvers"""
+    _name = 'farm.transaction.memo'
+    _description = 'Farm Transaction Memo'
+
+    @api.model
+    def _get_memo(self):
+        """Return the memo of the current transaction, dropped on commit/rollback"""
+        cr = self.env.cr
+        key = f'memo.{self._name}'
+        memo = cr.cache.get(key)
+        if memo is None:
+            memo = cr.cache[key] = {}
+
+            def clear_memo():
+                cr.cache.pop(key, None)
+            cr.postcommit.add(clear_memo)
+            cr.postrollback.add(clear_memo)
+        return memo
+
+
+class FarmCostResolver(models.AbstractModel):
+    """Resolve the cost of consumed inputs from their validated stock moves.
+
+    Every move is valued by the first strategy of the configured order that
+    gives it a cost. Move costs are memoized per transaction, so the line cost
+    compute and the analytic entry generator share one valuation per move.
+    """
+    _name = 'farm.cost.resolver'
+    _inherit = 'farm.transaction.memo'
+    _description = 'Farm Cost Resolver'
+
+    # Strategies in their default order, see _cost_from_<strategy>
+    _COST_STRATEGIES = ['account_moves', 'valuation_layers', 'move_price', 'standard_price']
+
+    @api.model
+    def _get_strategy_order(self):
+        """Return the configured order of the cost strategies"""
+        param = self.env['ir.config_parameter'].sudo().get_param('farm_management.cost_strategy_order')
+        if not param:
+            return self._COST_STRATEGIES
+        strategies = [s.strip() for s in param.split(',') if s.strip() in self._COST_STRATEGIES]
+        return strategies or self._COST_STRATEGIES
+
+    @api.model
+    def _get_move_costs(self, moves):
+        """Return {move id: cost} of moves, valuing the moves not yet memoized"""
+        memo = self._get_memo()
+        pending = moves.filtered(lambda m: m.id not in memo)
+        for strategy in self._get_strategy_order():
+            if not pending:
+                break
+            costs = getattr(self, f'_cost_from_{strategy}')(pending)
+            for move_id, cost in costs.items():
+                if cost > 0:
+                    memo[move_id] = cost
+            pending = pending.filtered(lambda m: m.id not in memo)
+        # Moves no strategy could value are not looked up again
+        for move in pending:
+            memo[move.id] = 0.0
+        return {move.id: memo[move.id] for move in moves}
+
+    @api.model
+    def _cost_from_account_moves(self, moves):
+        """Credit lines of the stock valuation entries of the moves"""
+        costs = {}
+        for move in moves:
+            expense_lines = move.account_move_ids.line_ids.filtered(
+                lambda l: l.account_id.account_type in ('expense', 'asset_current')
+                and l.balance < 0  # Credit entries for stock valuation
+            )
+            costs[move.id] = sum(abs(l.balance) for l in expense_lines)
+        return costs
+
+    @api.model
+    def _cost_from_valuation_layers(self, moves):
+        """Stock valuation layers of the moves, read in one grouped query"""
+        if 'stock.valuation.layer' not in self.env:
+            return {}
+        return {
+            move.id: abs(value)  # Valuation layers are negative for outgoing moves
+            for move, value in self.env['stock.valuation.layer']._read_group(
+                [('stock_move_id', 'in', moves.ids)],
+                groupby=['stock_move_id'],
+                aggregates=['value:sum'],
+            )
+        }
+
+    @api.model
+    def _cost_from_move_price(self, moves):
+        """Unit price recorded on the moves"""
+        costs = {}
+        for move in moves:
+            unit_price = (
+                'product_price_value_unit' in move._fields and move.product_price_value_unit
+                or move.price_unit
+            )
+            costs[move.id] = abs(unit_price or 0.0) * move.product_qty
+        return costs
+
+    @api.model
+    def _cost_from_standard_price(self, moves):
+        """Current standard price of the moved products"""
+        return {move.id: move.product_id.standard_price * move.product_qty for move in moves}
+
+    @api.model
+    def _get_done_moves(self, reports, products=None):
+        """Return the done moves of reports grouped by (report id, product id).
+
+        Uses a single grouped read on (report, product).
+        """
+        if not reports:
+            return {}
+        domain = [('daily_report_id', 'in', reports.ids), ('state', '=', 'done')]
+        if products is not None:
+            domain.append(('product_id', 'in', products.ids))
+        return {
+            (report.id, product.id): moves
+            for report, product, moves in self.env['stock.move']._read_group(
+                domain, groupby=['daily_report_id', 'product_id'], aggregates=['id:recordset'],
+            )
+        }
+
+    @api.model
+    def _get_unit_costs(self, moves_by_key):
+        """Return the weighted unit cost of each group of done moves.
+
+        All moves are valued in one pass; groups whose moves have no cost or
+        no quantity are left out so that callers apply their own fallback.
+        """
+        if not moves_by_key:
+            return {}
+        move_costs = self._get_move_costs(self.env['stock.move'].concat(*moves_by_key.values()))
+        unit_costs = {}
+        for key, moves in moves_by_key.items():
+            total_cost = sum(move_costs[move.id] for move in moves)
+            total_qty = sum(moves.mapped('product_qty'))
+            if total_cost > 0 and total_qty > 0:
+                unit_costs[key] = total_cost / total_qty
+        return unit_costs
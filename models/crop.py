@@ -165,12 +165,11 @@ class Crop(models.Model):
                 
             # If no product_id is provided, create one automatically
             if not vals.get('product_id'):
-                # Get the Agricultural category using robust, concise search-based fallback logic
-                agricultural_category = self.env['product.category'].search([
-                    ('name', '=', 'Agricultural'),
-                    ('parent_id.name', '=', 'Farm Management')
-                ], limit=1) or self.env['product.category'].search([
-                    ('name', '=', 'Agricultural')
+                # Get the Agricultural category from its XML id, or any category classified as such
+                agricultural_category = self.env.ref(
+                    'farm_management.product_category_agricultural', raise_if_not_found=False
+                ) or self.env['product.category'].search([
+                    ('farm_cost_type', '=', 'agricultural')
                 ], limit=1)
                 
                 # If category doesn't exist, create the required hierarchy
@@ -192,6 +191,7 @@ class Crop(models.Model):
                     agricultural_category = self.env['product.category'].create({
                         'name': 'Agricultural',
                         'parent_id': farm_management_category.id,
+                        'farm_cost_type_manual': 'agricultural',
                         'property_cost_method': 'average',
                         'property_valuation': 'manual_periodic',
                     })
@@ -184,7 +184,7 @@ class CropBOMLine(models.Model):
         string='Product',
         required=True, 
         tracking=True,
-        domain="[('categ_id', 'child_of', input_type_category_id)] if input_type_category_id else [('categ_id', 'child_of', parent_farm_category_id), ('categ_id.name', '!=', 'Agricultural')]",
+        domain="[('categ_id', 'child_of', input_type_category_id)] if input_type_category_id else [('categ_id', 'child_of', parent_farm_category_id), ('farm_cost_type', '!=', 'agricultural')]",
     )
     name = fields.Char(related='product_id.name', string='Name', readonly=True, 
                       store=True, translate=False)
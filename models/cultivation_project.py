@@ -2,6 +2,7 @@ from odoo import fields, models, api, _
 from odoo.exceptions import ValidationError
 from odoo.osv import expression
 from datetime import timedelta
+from .farm_perf_sample import instrumented
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -86,6 +87,17 @@ class CultivationProject(models.Model):
                              currency_field='currency_id', tracking=True)
     profit = fields.Monetary('Profit', compute='_compute_profit', store=True, 
                           currency_field='currency_id')
+    # Dashboard figures, summed from the KPI snapshots instead of recomputed
+    kpi_cost_amount = fields.Monetary('Reported Cost', compute='_compute_kpi_figures',
+                                      currency_field='currency_id',
+                                      help='Cost of the done daily reports, from the KPI snapshots')
+    kpi_revenue = fields.Monetary('Confirmed Revenue', compute='_compute_kpi_figures',
+                                  currency_field='currency_id',
+                                  help='Total of the confirmed sales orders, from the KPI snapshots')
+    kpi_profit = fields.Monetary('Margin', compute='_compute_kpi_figures', currency_field='currency_id',
+                                 help='Confirmed revenue minus reported cost, from the KPI snapshots')
+    kpi_irrigation_hours = fields.Float('Irrigation Hours', compute='_compute_kpi_figures',
+                                        help='Irrigation hours of the done daily reports, from the KPI snapshots')
     currency_id = fields.Many2one('res.currency', related='company_id.currency_id')
     company_id = fields.Many2one('res.company', related='farm_id.company_id', 
                                 store=True)
@@ -115,6 +127,9 @@ class CultivationProject(models.Model):
     # Stock movements
     stock_picking_id = fields.Many2one('stock.picking', string='Harvest Receipt',
                                      help='The receipt created when harvested crop is moved to inventory')
+    location_id = fields.Many2one('stock.location', string='Stock Location',
+                                  readonly=True, copy=False, ondelete='restrict',
+                                  help='Production location consuming inputs and producing the harvest')
     
     # Irrigation statistics
     total_irrigation_hours = fields.Float(string='Total Irrigation Hours', 
@@ -162,7 +177,7 @@ class CultivationProject(models.Model):
                     
                 })
                 vals['analytic_account_id'] = analytic_account.id
-                _logger.info(f"Created analytic account '{analytic_account.name}' for cultivation project")
+                _logger.info("Created analytic account '%s' for cultivation project", analytic_account.name)
                 
             # Set budget based on BOM if available
             if vals.get('crop_bom_id') and not vals.get('budget'):
@@ -183,13 +198,13 @@ class CultivationProject(models.Model):
                     # In Odoo v18, the field name is account_id instead of analytic_account_id
                     'account_id': vals.get('analytic_account_id'),  # Use our created analytic account
                 }
-                _logger.info(f"Creating project with values: {project_values}")
+                _logger.debug("Creating project with values: %s", project_values)
                 project = self.env['project.project'].create(project_values)
                 vals['project_id'] = project.id
                 
                 # In Odoo v18, we link our custom analytic account to the project using the account_id field
                 # This ensures all project activities will be tracked under our farm management analytic account
-                _logger.info(f"Linked analytic account to project {project.name}")
+                _logger.debug("Linked analytic account to project %s", project.name)
                 
             # Update field status
             if vals.get('field_id'):
@@ -239,9 +254,31 @@ class CultivationProject(models.Model):
             if project_vals and project.project_id:
                 project.project_id.write(project_vals)
         
+        # Harvest yields enter the KPI snapshots when the project reaches sales
+        harvested = reopened = self.browse()
+        if 'state' in vals:
+            if vals['state'] in ('sales', 'done'):
+                harvested = self.filtered(lambda p: p.state not in ('sales', 'done'))
+            else:
+                reopened = self.filtered(lambda p: p.state in ('sales', 'done'))
+
         result = super().write(vals)
+
+        Kpi = self.env['farm.project.kpi']
+        if reopened:
+            Kpi._reverse([('project_id', 'in', reopened.ids), ('event', '=', 'harvest')])
+        Kpi._record_harvests(harvested)
+        
+        if 'name' in vals:
+            for project in self.filtered('location_id'):
+                crop_name = project.crop_id.name if project.crop_id else 'N/A'
+                project.location_id.write({'name': f"Project: {project.name} - {crop_name}"})
         
         if 'state' in vals:
+            if vals['state'] == 'sales':
+                # Update product price and create harvest stock move when moving to sales state
+                self._update_product_price()
+                self._create_harvest_stock_move()
             for project in self:
                 if vals['state'] == 'sowing':
                     project.field_id.write({
@@ -250,10 +287,6 @@ class CultivationProject(models.Model):
                     })
                 elif vals['state'] == 'harvest':
                     project.field_id.write({'state': 'harvested'})
-                elif vals['state'] == 'sales':
-                    # Update product price and create harvest stock move when moving to sales state
-                    project._update_product_price()
-                    project._create_harvest_stock_move()
                 elif vals['state'] == 'done':
                     project.field_id.write({
                         'state': 'fallow',
@@ -309,23 +342,61 @@ class CultivationProject(models.Model):
         else:
             self.budget = 0.0
     
-    @api.depends('cost_line_ids.cost_amount', 'daily_report_ids.actual_cost')
+    @api.depends('cost_line_ids.cost_amount', 'cost_line_ids.source_type', 'cost_line_ids.source_id',
+                 'daily_report_ids.actual_cost', 'daily_report_ids.state')
+    @instrumented
     def _compute_actual_cost(self):
-        """Compute actual costs from cost analysis lines and daily reports"""
-        for project in self:
+        """Compute actual costs from cost analysis lines and daily reports.
+
+        Done reports count unless they were explicitly added as cost lines of
+        the project. Saved projects are summed with grouped reads for the whole
+        batch; unsaved ones (onchange) from their in-memory lines.
+        """
+        projects = self.filtered('id')
+        cost_line_totals = {}
+        report_totals = {}
+        if projects:
+            CostAnalysis = self.env['farm.cost.analysis']
+            Report = self.env['farm.daily.report']
             # Get costs from cost lines
-            cost_line_total = sum(project.cost_line_ids.mapped('cost_amount'))
-            
-            # Get costs from confirmed/done daily reports if not already in cost lines
-            daily_report_total = 0
-            for report in project.daily_report_ids.filtered(lambda r: r.state == 'done'):
-                # Only include report costs that haven't been explicitly added as cost lines
-                existing_cost_line = project.cost_line_ids.filtered(lambda l: 
-                    l.source_type == 'daily_report' and l.source_id == report.id)
-                if not existing_cost_line:
-                    daily_report_total += report.actual_cost
-            
-            project.actual_cost = cost_line_total + daily_report_total
+            cost_line_totals = {
+                project.id: total
+                for project, total in CostAnalysis._read_group(
+                    [('project_id', 'in', projects.ids)], ['project_id'], ['cost_amount:sum'])
+            }
+            # Get costs from done daily reports
+            report_totals = {
+                project.id: total
+                for project, total in Report._read_group(
+                    [('project_id', 'in', projects.ids), ('state', '=', 'done')], ['project_id'], ['actual_cost:sum'])
+            }
+            # Only include report costs that haven't been explicitly added as cost lines
+            covered_ids = {
+                project.id: set(source_ids)
+                for project, source_ids in CostAnalysis._read_group(
+                    [('project_id', 'in', projects.ids), ('source_type', '=', 'daily_report')],
+                    ['project_id'], ['source_id:array_agg'])
+            }
+            if covered_ids:
+                covered_reports = Report.search_fetch([
+                    ('project_id', 'in', list(covered_ids)),
+                    ('state', '=', 'done'),
+                    ('id', 'in', list(set().union(*covered_ids.values()))),
+                ], ['project_id', 'actual_cost'])
+                for report in covered_reports:
+                    if report.id in covered_ids[report.project_id.id]:
+                        report_totals[report.project_id.id] -= report.actual_cost
+
+        for project in self:
+            if project.id:
+                project.actual_cost = cost_line_totals.get(project.id, 0.0) + report_totals.get(project.id, 0.0)
+                continue
+            cost_lines = project.cost_line_ids
+            covered = {l.source_id for l in cost_lines if l.source_type == 'daily_report'}
+            project.actual_cost = sum(cost_lines.mapped('cost_amount')) + sum(
+                report.actual_cost for report in project.daily_report_ids
+                if report.state == 'done' and report._origin.id not in covered
+            )
     
     @api.depends('actual_cost', 'revenue')
     def _compute_profit(self):
@@ -333,6 +404,23 @@ class CultivationProject(models.Model):
         for project in self:
             project.profit = project.revenue - project.actual_cost
     
+    def _compute_kpi_figures(self):
+        """Sum the KPI snapshots of the projects in one grouped read"""
+        figures = {
+            project: (cost, revenue, hours)
+            for project, cost, revenue, hours in self.env['farm.project.kpi'].sudo()._read_group(
+                [('project_id', 'in', self.filtered('id').ids)],
+                groupby=['project_id'],
+                aggregates=['cost_amount:sum', 'revenue:sum', 'irrigation_hours:sum'],
+            )
+        }
+        for project in self:
+            cost, revenue, hours = figures.get(project, (0.0, 0.0, 0.0))
+            project.kpi_cost_amount = cost
+            project.kpi_revenue = revenue
+            project.kpi_profit = revenue - cost
+            project.kpi_irrigation_hours = hours
+
     def _compute_daily_report_count(self):
         """Count the number of daily reports for this project"""
         for project in self:
@@ -477,6 +565,7 @@ class CultivationProject(models.Model):
         """Set to growing state"""
         return self.write({'state': 'growing'})
     
+    @instrumented
     def action_harvest(self):
         """Set to harvest state and ensure the UoM is set from the product"""
         for project in self:
@@ -489,11 +578,15 @@ class CultivationProject(models.Model):
                     project.harvest_price = project.crop_id.product_id.list_price
             return project.write({'state': 'harvest'})
     
+    @instrumented
     def action_sales(self):
         """
         Set to sales state with stock movement validation
         This follows the purchase order receipt workflow, validating the 
-        picking to update the product's on-hand quantity
+        picking to update the product's on-hand quantity.
+
+        All projects are handled together: quantities are prepared with
+        batched writes and the harvest receipts are validated in one call.
         """
         for project in self:
             if not project.actual_yield or project.actual_yield <= 0:
@@ -503,107 +596,134 @@ class CultivationProject(models.Model):
             if not project.harvest_price or project.harvest_price <= 0:
                 raise ValidationError(_("Please specify a valid harvest price before proceeding to sales."))
             
-            # Create the harvest stock move if it doesn't exist
-            if not project.stock_picking_id:
-                project._create_harvest_stock_move()
-            
-            # Validate the picking to update on-hand quantities
-            if project.stock_picking_id and project.stock_picking_id.state != 'done':
-                picking = project.stock_picking_id
-                
-                # Ensure quantities and pricing are set on moves
-                for move in picking.move_ids:
-                    # Update the move quantity if needed
-                    if move.product_uom_qty != project.actual_yield:
-                        move.product_uom_qty = project.actual_yield
-                        
-                    # Update the move price if needed
-                    if move.price_unit != project.harvest_price:
-                        move.price_unit = project.harvest_price
-                
-                    # Ensure quantities are set on move lines
-                    for move_line in move.move_line_ids:
-                        move_line.quantity = project.actual_yield
-                
-                # Ensure all moves have proper move lines for validation
-                for move in picking.move_ids:
-                    # Make sure we have at least one move line
-                    if not move.move_line_ids:
-                        self.env['stock.move.line'].create({
-                            'move_id': move.id,
-                            'product_id': move.product_id.id,
-                            'product_uom_id': move.product_uom.id,
-                            'location_id': move.location_id.id,
-                            'location_dest_id': move.location_dest_id.id,
-                            'picking_id': move.picking_id.id,
-                            'company_id': move.company_id.id,
-                            'quantity': move.product_uom_qty,  # In Odoo 18, quantity is the field for actual quantities
-                        })
-                    
-                    # Update existing move lines
-                    for move_line in move.move_line_ids:
-                        if move_line.quantity <= 0:
-                            move_line.quantity = project.actual_yield
+        # Create the harvest receipts that don't exist yet
+        self.filtered(lambda p: not p.stock_picking_id)._create_harvest_stock_move()
 
-                # Try to reserve the picking if not already done
-                if picking.state not in ['assigned', 'done']:
-                    picking.action_assign()
-                
-                # Validate the picking
+        # Validate the pickings to update on-hand quantities
+        projects = self.filtered(lambda p: p.stock_picking_id and p.stock_picking_id.state != 'done')
+        if projects:
+            pickings = projects.stock_picking_id
+            projects._prepare_harvest_moves()
+
+            # Try to reserve the pickings not already ready
+            pickings.filtered(lambda p: p.state not in ['assigned', 'done']).action_assign()
+
+            # Validate the pickings
+            try:
+                # First try with standard validation
+                with self.env.cr.savepoint():
+                    pickings.with_context(skip_backorder=True).button_validate()
+            except Exception as e:
+                _logger.warning("Standard validation failed: %s. Trying alternative method...", e)
                 try:
-                    # First try with standard validation
-                    picking.with_context(skip_backorder=True).button_validate()
-                except Exception as e:
-                    _logger.warning(f"Standard validation failed: {str(e)}. Trying alternative method...")
-                    try:
-                        # Mark all move lines as done with their quantities
-                        for move in picking.move_ids:
-                            for move_line in move.move_line_ids:
-                                move_line.quantity = move.product_uom_qty
-                        
-                        # Validate the picking
-                        picking._action_done()
-                    except Exception as e2:
-                        _logger.error(f"Alternative validation failed: {str(e2)}")
-                        raise ValidationError(_(
-                            "Failed to validate the harvest receipt: %(error)s\n"
-                            "Please make sure:\n"
-                            "1. The product is properly configured as stockable\n"
-                            "2. The source and destination locations are valid\n"
-                            "3. The unit of measure is properly set"
-                        ) % {'error': str(e2)})
-                
-                # Verify the validation was successful
-                if picking.state == 'done':
-                    product = project.crop_id.product_id
-                    # Check actual quantity in destination location
-                    current_qty = product.with_context(location=picking.location_dest_id.id).qty_available
-                    
-                    project.message_post(body=_(
-                        "Harvest receipt validated successfully. Product inventory updated.\n"
-                        "Product: %(product)s\n"
-                        "Added quantity: %(qty)s %(uom)s\n"
-                        "Current stock in %(location)s: %(current)s %(uom)s"
-                    ) % {
-                        'product': product.name,
-                        'qty': project.actual_yield,
-                        'uom': project.yield_uom_id.name,
-                        'location': picking.location_dest_id.name,
-                        'current': current_qty,
-                    })
-                else:
+                    # Mark all move lines as done with their quantities
+                    projects._prepare_harvest_moves(force=True)
+                    pickings.filtered(lambda p: p.state != 'done')._action_done()
+                except Exception as e2:
+                    _logger.error("Alternative validation failed: %s", e2)
                     raise ValidationError(_(
-                        "Failed to validate the harvest receipt. Current state: %(state)s. "
-                        "Please check inventory settings and make sure all quantities are set correctly."
-                    ) % {'state': picking.state})
-            
-            # Update project state
-            project.write({'state': 'sales'})
-            
-            # Update product pricing
-            project._update_product_price()
+                        "Failed to validate the harvest receipt: %(error)s\n"
+                        "Please make sure:\n"
+                        "1. The product is properly configured as stockable\n"
+                        "2. The source and destination locations are valid\n"
+                        "3. The unit of measure is properly set"
+                    ) % {'error': str(e2)})
+
+            # Verify the validation was successful
+            failed = pickings.filtered(lambda p: p.state != 'done')
+            if failed:
+                raise ValidationError(_(
+                    "Failed to validate the harvest receipt. Current state: %(state)s. "
+                    "Please check inventory settings and make sure all quantities are set correctly."
+                ) % {'state': failed[0].state})
+            projects._post_harvest_validation_messages()
+
+        # Update project state, which also updates product pricing
+        self.write({'state': 'sales'})
         
         return True
+
+    def _prepare_harvest_moves(self, force=False):
+        """Set the yield and price of the projects on their harvest moves and move lines.
+
+        Records sharing the same values are written together; move lines are
+        created in one batch for the moves that have none. With ``force``, all
+        move lines get the full quantity of their move.
+        """
+        moves_by_vals = {}
+        move_lines_by_qty = {}
+        moves_without_lines = self.env['stock.move']
+        for project in self:
+            for move in project.stock_picking_id.move_ids:
+                # Update the move quantity and price if needed
+                vals = {}
+                if move.product_uom_qty != project.actual_yield:
+                    vals['product_uom_qty'] = project.actual_yield
+                if move.price_unit != project.harvest_price:
+                    vals['price_unit'] = project.harvest_price
+                if vals:
+                    key = tuple(sorted(vals.items()))
+                    moves_by_vals[key] = moves_by_vals.get(key, self.env['stock.move']) | move
+
+                # Ensure quantities are set on move lines
+                if not move.move_line_ids:
+                    moves_without_lines |= move
+                elif force or any(line.quantity != project.actual_yield for line in move.move_line_ids):
+                    move_lines_by_qty[project.actual_yield] = (
+                        move_lines_by_qty.get(project.actual_yield, self.env['stock.move.line'])
+                        | move.move_line_ids
+                    )
+
+        for vals, moves in moves_by_vals.items():
+            moves.write(dict(vals))
+        for quantity, move_lines in move_lines_by_qty.items():
+            move_lines.write({'quantity': quantity})
+        # Ensure all moves have proper move lines for validation
+        self.env['stock.move.line'].create([{
+            'move_id': move.id,
+            'product_id': move.product_id.id,
+            'product_uom_id': move.product_uom.id,
+            'location_id': move.location_id.id,
+            'location_dest_id': move.location_dest_id.id,
+            'picking_id': move.picking_id.id,
+            'company_id': move.company_id.id,
+            'quantity': move.product_uom_qty,  # In Odoo 18, quantity is the field for actual quantities
+        } for move in moves_without_lines])
+
+    def _post_harvest_validation_messages(self):
+        """Post one summary message per project, reading on-hand stock once per location.
+
+        In digest mode the messages are queued for the responsible users instead.
+        """
+        current_qty = {}
+        for location in self.stock_picking_id.location_dest_id:
+            projects = self.filtered(lambda p: p.stock_picking_id.location_dest_id == location)
+            products = projects.crop_id.product_id.with_context(location=location.id)
+            for product in products:
+                current_qty[(product.id, location.id)] = product.qty_available
+
+        digest = self.env['farm.harvest.notice']._is_digest_enabled()
+        notes = []
+        for project in self:
+            product = project.crop_id.product_id
+            location = project.stock_picking_id.location_dest_id
+            body = _(
+                "Harvest receipt validated successfully. Product inventory updated.\n"
+                "Product: %(product)s\n"
+                "Added quantity: %(qty)s %(uom)s\n"
+                "Current stock in %(location)s: %(current)s %(uom)s"
+            ) % {
+                'product': product.name,
+                'qty': project.actual_yield,
+                'uom': project.yield_uom_id.name,
+                'location': location.name,
+                'current': current_qty.get((product.id, location.id), 0.0),
+            }
+            if digest:
+                notes.append((project, 'validation', body))
+            else:
+                project.message_post(body=body)
+        self.env['farm.harvest.notice']._enqueue(notes)
     
     def action_done(self):
         """Set to done state"""
@@ -677,353 +797,194 @@ class CultivationProject(models.Model):
                     f"Updated product {product.name}: "
                     f"list_price={product.list_price}, standard_price={product.standard_price}"
                 )
-    def _get_or_create_project_location(self):
-        """Get or create a stock location for this cultivation project's field."""
+
+    def _get_stock_location(self):
+        """Return the project's production location (Farm → Field → Project),
+        creating and linking it on first use"""
         self.ensure_one()
-        
-        location_name = f"Field: {self.field_id.name} (F{self.field_id.id})"
-        
-        # First, try to find an existing location for this field
+        if self.location_id:
+            return self.location_id
+
+        field_location = self.field_id._get_stock_location()
+        crop_name = self.crop_id.name if self.crop_id else 'N/A'
+        project_crop_name = f"Project: {self.name} - {crop_name}"
+
+        # Adopt a location created before locations were linked to projects
         location = self.env['stock.location'].search([
-            ('name', '=', location_name),
-            ('company_id', '=', self.company_id.id),
-            ('usage', 'in', ['internal', 'production'])  # Look for both types for backward compatibility
-        ], limit=1)
-        
-        if location:
-            return location
-        
-        # No location found, we need to create one
-        # First, get or create a parent "Farms" location
-        farms_name = _('Farms')  # Get translation at runtime
-        parent_location = self.env['stock.location'].search([
-            ('name', '=', farms_name),
-            ('usage', '=', 'view'),
+            ('name', '=', project_crop_name),
+            ('location_id', '=', field_location.id),
             ('company_id', '=', self.company_id.id)
         ], limit=1)
-        
-        if not parent_location:
-            # Get company stock location as parent
-            company_location = self.env['stock.warehouse'].search([
-                ('company_id', '=', self.company_id.id)
-            ], limit=1).view_location_id
-            
-            # Create Farms parent location
-            parent_location = self.env['stock.location'].create({
-                'name': farms_name,
-                'usage': 'view',
-                'location_id': company_location.id,
-                'company_id': self.company_id.id
+
+        if not location:
+            location = self.env['stock.location'].create({
+                'name': project_crop_name,
+                'usage': 'production',  # Using production type for project operations
+                'location_id': field_location.id,
+                'company_id': self.company_id.id,
             })
-        
-        # Now create the field/project location
-        farm_name = self.farm_id.name
-        field_name = self.field_id.name
-        
-        location = self.env['stock.location'].create({
-            'name': location_name,
-            'usage': 'production',  # Production type for farm fields
-            'location_id': parent_location.id,
-            'company_id': self.company_id.id,
-            'comment': f"Field location for {farm_name} - {field_name} (Project: {self.code})"
-        })
-        
+
+        self.sudo().location_id = location.id
         return location
+
+    def action_create_harvest_receipts(self):
+        """Create the harvest receipts of the selected projects and report the skipped ones"""
+        results = self._create_harvest_stock_move()
+        created = [r for r in results.values() if r['status'] == 'created']
+        skipped = self.filtered(lambda p: results[p.id]['status'] == 'skipped')
+        message = _("%d harvest receipt(s) created.") % len(created)
+        if skipped:
+            message += "\n" + "\n".join(
+                _("%(project)s: %(reason)s", project=project.display_name, reason=results[project.id]['message'])
+                for project in skipped
+            )
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Harvest Receipts'),
+                'message': message,
+                'type': 'warning' if skipped else 'success',
+                'sticky': bool(skipped),
+            }
+        }
+
+    def _get_harvest_skip_reason(self):
+        """Return why no harvest receipt can be created for the project, or False"""
+        self.ensure_one()
+        if self.stock_picking_id and self.stock_picking_id.state != 'cancel':
+            return _("A harvest receipt already exists.")
+        if self.state != 'harvest':
+            return _("The project is not in the harvest stage.")
+        if not self.actual_yield > 0:
+            return _("No actual yield is set.")
+        if not self.crop_id.product_id:
+            return _("The crop has no product.")
+        if not self.yield_uom_id:
+            return _("No yield unit of measure is set.")
+        if self.crop_id.product_id.type != 'consu':
+            return _("The crop product is not stockable.")
+        return False
+
+    @instrumented
     def _create_harvest_stock_move(self):
         """
-        Create harvest receipt stock moves for the harvested crop using incoming receipts.
+        Create harvest receipts for the harvested crop of all projects at once.
         This follows the purchase order receipt flow but in reverse - from field to warehouse.
+
+        Pickings, moves and move lines are created with one create per
+        company; projects that cannot be received are skipped, not fatal.
+        In digest mode, the created receipts and the harvested projects that
+        could not be received are queued for the responsible users.
+
+        Returns:
+            dict: {project id: {'status': 'created' or 'skipped',
+                                'picking_id': receipt id or False,
+                                'message': reason the project was skipped}}
         """
+        digest = self.env['farm.harvest.notice']._is_digest_enabled()
+        notes = []
+        results = {}
+        projects_by_company = {}
         for project in self:
-            if not (project.state in ['harvest'] and 
-                   project.actual_yield > 0 and
-                   project.crop_id and 
-                   project.crop_id.product_id and
-                   project.yield_uom_id):
-                return False
-                
-            # Get the product from the crop
-            product = project.crop_id.product_id
-                
-            # Only create stock moves for stockable or consumable products
-            if product.type != 'consu':
-                _logger.info(f"Skipping inventory movement for non-stockable product {product.name}")
-                continue
+            reason = project._get_harvest_skip_reason()
+            if reason:
+                results[project.id] = {'status': 'skipped', 'picking_id': False, 'message': reason}
+                # Only harvested projects without a receipt need attention
+                has_receipt = project.stock_picking_id and project.stock_picking_id.state != 'cancel'
+                if digest and project.state == 'harvest' and not has_receipt:
+                    notes.append((project, 'skipped', reason))
+            else:
+                projects_by_company.setdefault(project.company_id, self.browse())
+                projects_by_company[project.company_id] |= project
 
-            # Find warehouse first
-            warehouse = self.env['stock.warehouse'].search([('company_id', '=', project.company_id.id)], limit=1)
-            if not warehouse:
-                raise ValidationError(_("No warehouse found for this company."))
-            
+        operation_name = _("Harvest Receipt")  # Translation at runtime is correct
+        for company, projects in projects_by_company.items():
             # Use warehouse stock location as destination (opposite of daily report)
-            dest_location = warehouse.lot_stock_id
-            if not dest_location:
-                dest_location = self.env.ref('stock.stock_location_stock', raise_if_not_found=False)
-                if not dest_location:
-                    dest_location = self.env['stock.location'].search([
-                        ('usage', '=', 'internal'),
-                        ('company_id', '=', project.company_id.id),
-                        ('name', 'ilike', 'Stock')
-                    ], limit=1)
-            
-            if not dest_location:
-                raise ValidationError(_("No stock location found in warehouse."))
+            dest_location = self.env['stock.warehouse']._get_farm_stock_location(company.id)
 
-            # Create hierarchical location structure: Farm → Field → Project
-            # Get the Physical Locations parent
-            physical_locations = self.env.ref('stock.stock_location_locations', raise_if_not_found=False)
-            if not physical_locations:
-                physical_locations = self.env['stock.location'].search([
-                    ('name', '=', 'Physical Locations'),
-                    ('usage', '=', 'view')
-                ], limit=1)
-                
-            if not physical_locations:
-                raise ValidationError(_("No Physical Locations found to create farm location hierarchy."))
-            
-            # 1. Create or find farm-level location (directly under Physical Locations)
-            farm_name = project.farm_id.name
-            farm_source_location = self.env['stock.location'].search([
-                ('name', '=', f"Farm: {farm_name}"),
-                ('location_id', '=', physical_locations.id),
-                ('company_id', '=', project.company_id.id)
-            ], limit=1)
-            
-            if not farm_source_location:
-                farm_source_location = self.env['stock.location'].create({
-                    'name': f"Farm: {farm_name}",
-                    'usage': 'production',  # Using production type for farm operations
-                    'location_id': physical_locations.id,
-                    'company_id': project.company_id.id,
-                })
-            
-            # 2. Create or find field-level location under farm
-            field_name = project.field_id.name
-            field_source_location = self.env['stock.location'].search([
-                ('name', '=', f"Field: {field_name}"),
-                ('location_id', '=', farm_source_location.id),
-                ('company_id', '=', project.company_id.id)
-            ], limit=1)
-            
-            if not field_source_location:
-                field_source_location = self.env['stock.location'].create({
-                    'name': f"Field: {field_name}",
-                    'usage': 'production',  # Using production type for field operations
-                    'location_id': farm_source_location.id,
-                    'company_id': project.company_id.id,
-                })
-            
-            # 3. Create or find project-level location (the actual source)
-            project_name = project.name 
-            crop_name = project.crop_id.name if project.crop_id else 'N/A'
-            project_crop_name = f"Project: {project_name} - {crop_name}"
-            source_location = self.env['stock.location'].search([
-                ('name', '=', project_crop_name),
-                ('location_id', '=', field_source_location.id),
-                ('company_id', '=', project.company_id.id)
-            ], limit=1)
-            
-            if not source_location:
-                source_location = self.env['stock.location'].create({
-                    'name': project_crop_name,
-                    'usage': 'production',  # Using production type for project operations
-                    'location_id': field_source_location.id,
-                    'company_id': project.company_id.id,
+            picking_vals_list = []
+            for project in projects:
+                # Farm → Field → Project location (the actual source)
+                source_location = project._get_stock_location()
+                # Use the incoming/receipt picking type (resolved once per company)
+                picking_type = self.env['stock.picking.type']._get_farm_picking_type(
+                    company.id, 'harvest', source_location
+                )
+                field_name = project.field_id.name or "N/A"
+                farm_name = project.farm_id.name or "N/A"
+                crop_name = project.crop_id.name or "N/A"
+                # Don't set 'name' to let Odoo use the sequence (WH/IN/000...)
+                picking_vals_list.append({
+                    'partner_id': project.farm_id.owner_id.id,
+                    'picking_type_id': picking_type.id,
+                    'location_id': source_location.id,           # Source: Field
+                    'location_dest_id': dest_location.id,      # Destination: Warehouse Stock
+                    'origin': f"Harvest: {project.name} ({project.code})",
+                    'scheduled_date': fields.Date.today(),
+                    'company_id': company.id,
+                    'move_type': 'direct',  # Direct transfer
+                    'note': f"Harvest receipt for crop: {crop_name}\nFrom farm: {farm_name}\nField: {field_name}\nProject: {project.name}",
                 })
+            pickings = self.env['stock.picking'].with_company(company).create(picking_vals_list)
 
-            # Use the incoming/receipt picking type (IN instead of OUT)
-            picking_type = warehouse.in_type_id
-            
-            if not picking_type:
-                # Fall back to any incoming picking type
-                picking_type = self.env['stock.picking.type'].search([
-                    ('code', '=', 'incoming'),
-                    ('warehouse_id', '=', warehouse.id)
-                ], limit=1)
-            
-            if not picking_type:
-                # Create a new incoming picking type for harvest operations
-                # Use standard sequence format (WH/IN/000) but with farm-specific default locations
-                sequence = self.env['ir.sequence'].search([
-                    ('code', '=', 'stock.picking.in'),
-                    ('company_id', '=', project.company_id.id)
-                ], limit=1)
-                
-                if not sequence:
-                    sequence = self.env['ir.sequence'].create({
-                        'name': 'Stock Incoming',
-                        'code': 'stock.picking.in',
-                        'prefix': 'WH/IN/',
-                        'padding': 5,
-                        'company_id': project.company_id.id,
-                    })
-                
-                picking_type = self.env['stock.picking.type'].create({
-                    'name': 'Harvest Receipts',
-                    'code': 'incoming',
-                    'sequence_code': 'IN',
-                    'default_location_src_id': source_location.id,   # From farm-specific location
-                    'default_location_dest_id': dest_location.id,    # To warehouse stock
-                    'sequence_id': sequence.id,
-                    'warehouse_id': warehouse.id,
-                    'company_id': project.company_id.id,
+            move_vals_list = []
+            for project, picking in zip(projects, pickings):
+                product = project.crop_id.product_id
+                move_vals_list.append({
+                    'name': f"{operation_name}: {product.name}",
+                    'product_id': product.id,
+                    'product_uom_qty': project.actual_yield,
+                    'product_uom': project.yield_uom_id.id,
+                    'picking_id': picking.id,
+                    'location_id': picking.location_id.id,
+                    'location_dest_id': picking.location_dest_id.id,
+                    'company_id': company.id,
+                    'state': 'draft',
+                    'price_unit': project.harvest_price,  # Set price for valuation
+                    'description_picking': f"{product.name} harvested from field {project.field_id.name or 'N/A'}",
                 })
+            self.env['stock.move'].with_company(company).create(move_vals_list)
 
-            # Create a receipt order (incoming) for harvest
-            # Get descriptive information for reference in the note
-            field_name = project.field_id.name if project.field_id else "N/A"
-            project_name = project.name or "N/A"
-            crop_name = project.crop_id.name if project.crop_id else "N/A"
-            
-            # Create the picking - don't set 'name' to let Odoo use the sequence (WH/IN/000...)
-            picking_vals = {
-                'location_id': source_location.id,  # From farm/field location (source)
-                'location_dest_id': dest_location.id,  # To warehouse stock (destination)
-                'picking_type_id': picking_type.id,
-                'scheduled_date': fields.Date.today(),
-                'origin': f'Project {project.code} - Harvest',
-                'company_id': project.company_id.id,
-                'move_type': 'direct',  # Direct transfer
-                'partner_id': False,  # No partner for internal harvest operations
-                'note': f"Harvest: Farm/{field_name}/{project_name} - {crop_name}",
-            }
-            
-            picking = self.env['stock.picking'].create(picking_vals)
-            project.stock_picking_id = picking.id
-                
-            # Use receipt picking type (purchase receipt) - WH/IN
-            picking_type = warehouse.in_type_id
-            
-            if not picking_type:
-                # Fall back to any receipt picking type
-                picking_type = self.env['stock.picking.type'].search([
-                    ('code', '=', 'incoming'),
-                    ('warehouse_id', '=', warehouse.id)
-                ], limit=1)
-            
-            if not picking_type:
-                # Create a new incoming picking type for harvest operations if missing
-                sequence = self.env['ir.sequence'].search([
-                    ('code', '=', 'stock.picking.in'),
-                    ('company_id', '=', project.company_id.id)
-                ], limit=1)
-                
-                if not sequence:
-                    sequence = self.env['ir.sequence'].create({
-                        'name': 'Stock Incoming',
-                        'code': 'stock.picking.in',
-                        'prefix': 'WH/IN/',
-                        'padding': 5,
-                        'company_id': project.company_id.id,
-                    })
-                
-                picking_type = self.env['stock.picking.type'].create({
-                    'name': 'Harvest Receipts',
-                    'code': 'incoming',
-                    'sequence_code': 'IN',
-                    'default_location_src_id': source_location.id,   # From farm/field
-                    'default_location_dest_id': dest_location.id,  # To warehouse stock
-                    'sequence_id': sequence.id,
-                    'warehouse_id': warehouse.id,
-                    'company_id': project.company_id.id,
-                })
-                
-            if not picking_type:
-                raise ValidationError(_("No receipt picking type found for warehouse."))
-            
-            # Create picking (receipt) - similar to purchase order receipt
-            operation_name = _("Harvest Receipt")  # Translation at runtime is correct
-            
-            # Get descriptive information for reference in the note
-            field_name = project.field_id.name if project.field_id else "N/A"
-            farm_name = project.farm_id.name or "N/A"
-            crop_name = project.crop_id.name if project.crop_id else "N/A"
-            
-            # Create the picking - don't set 'name' to let Odoo use the sequence (WH/IN/000...)
-            picking_vals = {
-                'partner_id': project.farm_id.owner_id.id if project.farm_id.owner_id else False,
-                'picking_type_id': picking_type.id,
-                'location_id': source_location.id,           # Source: Field
-                'location_dest_id': dest_location.id,      # Destination: Warehouse Stock
-                'origin': f"Harvest: {project.name} ({project.code})",
-                'scheduled_date': fields.Date.today(),
-                'company_id': project.company_id.id,
-                'move_type': 'direct',  # Direct transfer
-                'note': f"Harvest receipt for crop: {crop_name}\nFrom farm: {farm_name}\nField: {field_name}\nProject: {project.name}",
-            }
-            
-            picking = self.env['stock.picking'].create(picking_vals)
-            
-            # Store the picking in the project for reference
-            project.stock_picking_id = picking.id
-            
-            # Create stock move with a descriptive name
-            move_vals = {
-                'name': f"{operation_name}: {product.name}",
-                'product_id': product.id,
-                'product_uom_qty': project.actual_yield,
-                'product_uom': project.yield_uom_id.id,
-                'picking_id': picking.id,
-                'location_id': source_location.id,
-                'location_dest_id': dest_location.id,
-                'company_id': project.company_id.id,
-                'state': 'draft',
-                'price_unit': project.harvest_price,  # Set price for valuation
-                'description_picking': f"{product.name} harvested from field {field_name}",
-            }
-            
-            self.env['stock.move'].create(move_vals)
-            
-            _logger.info(f"Created stock move for {product.name}, quantity: {project.actual_yield}")
-            
-            # Confirm the picking to make products show as "incoming" in inventory
-            if picking.move_ids:
-                # Just confirm the picking (will update incoming quantities automatically)
-                picking.action_confirm()
-                
-                # Try to reserve quantities (for harvest, this means mark as available)
-                picking.action_assign()
-                
-                # Log the status but don't auto-validate - this will be done in action_sales
-                if all(move.state == 'assigned' for move in picking.move_ids):
-                    _logger.info(f"Harvest picking {picking.name} is ready for validation")
-                else:
-                    _logger.info(f"Harvest picking {picking.name} is partially ready for validation")
-                    
-                # Create move lines to make validation easier later
-                for move in picking.move_ids:
-                    if not move.move_line_ids:
-                        # Create move lines manually with basic values
-                        move_line_vals = {
-                            'move_id': move.id,
-                            'product_id': move.product_id.id,
-                            'product_uom_id': move.product_uom.id,
-                            'location_id': move.location_id.id,
-                            'location_dest_id': move.location_dest_id.id,
-                            'picking_id': move.picking_id.id,
-                            'company_id': move.company_id.id,
-                            'quantity': 0,  # Will be set during validation
-                        }
-                        self.env['stock.move.line'].create(move_line_vals)
-                        
-                # Log success
-                _logger.info(f"Created harvest receipt {picking.name} for project {project.name}")
-                
-                # Add chatter message
-                project.message_post(
-                    body=_("Harvest receipt %s created for %s %s of %s") % (
-                        picking.name,
-                        project.actual_yield,
-                        project.yield_uom_id.name,
-                        product.name
-                    ),
-                    subject=_("Harvest Receipt Created"),
-                    message_type='comment'
+            # Confirm the pickings to make products show as "incoming" in inventory,
+            # then reserve them (for harvest, this means mark as available)
+            pickings.action_confirm()
+            pickings.action_assign()
+
+            # Create move lines to make validation easier later, in action_sales
+            moves_without_lines = pickings.move_ids.filtered(lambda m: not m.move_line_ids)
+            self.env['stock.move.line'].create([{
+                'move_id': move.id,
+                'product_id': move.product_id.id,
+                'product_uom_id': move.product_uom.id,
+                'location_id': move.location_id.id,
+                'location_dest_id': move.location_dest_id.id,
+                'picking_id': move.picking_id.id,
+                'company_id': move.company_id.id,
+                'quantity': 0,  # Will be set during validation
+            } for move in moves_without_lines])
+
+            for project, picking in zip(projects, pickings):
+                project.stock_picking_id = picking
+                body = _("Harvest receipt %s created for %s %s of %s") % (
+                    picking.name,
+                    project.actual_yield,
+                    project.yield_uom_id.name,
+                    project.crop_id.product_id.name,
                 )
-            
-            return picking
-        
-        return False
+                if digest:
+                    notes.append((project, 'receipt', body))
+                else:
+                    project.message_post(
+                        body=body,
+                        subject=_("Harvest Receipt Created"),
+                        message_type='comment'
+                    )
+                results[project.id] = {'status': 'created', 'picking_id': picking.id, 'message': False}
+            _logger.info("Created %s harvest receipts for company %s", len(pickings), company.name)
+
+        self.env['farm.harvest.notice']._enqueue(notes)
+        return results
     
     def _create_inventory_adjustment(self, product, location, quantity):
         """
@@ -1037,7 +998,7 @@ class CultivationProject(models.Model):
         """
         self.ensure_one()
         
-        _logger.info(f"Creating inventory adjustment for {product.name}, qty: {quantity}")
+        _logger.info("Creating inventory adjustment for %s, qty: %s", product.name, quantity)
         
         # Use stock quant directly in Odoo 18
         quant = self.env['stock.quant'].search([
@@ -1050,7 +1011,7 @@ class CultivationProject(models.Model):
                 # Update existing quant
                 starting_qty = quant.quantity
                 quant.write({'quantity': starting_qty + quantity})
-                _logger.info(f"Updated quant quantity from {starting_qty} to {starting_qty + quantity}")
+                _logger.debug("Updated quant quantity from %s to %s", starting_qty, starting_qty + quantity)
             else:
                 # Create new quant
                 self.env['stock.quant'].create({
@@ -1059,33 +1020,41 @@ class CultivationProject(models.Model):
                     'quantity': quantity,
                     'company_id': self.company_id.id
                 })
-                _logger.info(f"Created new quant with quantity {quantity}")
+                _logger.debug("Created new quant with quantity %s", quantity)
             
-            # Notify in the chatter
-            self.message_post(body=_(
+            # Notify in the chatter, or in the responsible user's digest
+            body = _(
                 "Created inventory adjustment for %(product)s, added %(qty)s %(uom)s to stock location."
             ) % {
                 'product': product.name,
                 'qty': quantity,
                 'uom': self.yield_uom_id.name,
-            })
+            }
+            if self.env['farm.harvest.notice']._is_digest_enabled():
+                self.env['farm.harvest.notice']._enqueue([(self, 'adjusted', body)])
+            else:
+                self.message_post(body=body)
             
         except Exception as e:
-            _logger.error(f"Error creating inventory adjustment: {str(e)}")
+            _logger.error("Error creating inventory adjustment: %s", e)
+            note = _(
+                "Failed to automatically adjust inventory for product %(product)s. "
+                "Please manually add %(qty)s %(uom)s to stock."
+            ) % {
+                'product': product.name,
+                'qty': quantity,
+                'uom': self.yield_uom_id.name,
+            }
+            if self.env['farm.harvest.notice']._is_digest_enabled():
+                self.env['farm.harvest.notice']._enqueue([(self, 'adjustment', note)])
+                return
             # Create a scheduled activity for manual resolution
             self.env['mail.activity'].create({
                 'res_model_id': self.env['ir.model']._get('farm.cultivation.project').id,
                 'res_id': self.id,
                 'user_id': self.env.ref('base.user_admin').id,
                 'summary': _('Manual inventory adjustment needed'),
-                'note': _(
-                    "Failed to automatically adjust inventory for product %(product)s. "
-                    "Please manually add %(qty)s %(uom)s to stock."
-                ) % {
-                    'product': product.name,
-                    'qty': quantity,
-                    'uom': self.yield_uom_id.name,
-                },
+                'note': note,
                 'activity_type_id': self.env.ref('mail.mail_activity_data_todo').id,
                 'date_deadline': fields.Date.today()
             })
@@ -1130,6 +1099,11 @@ class CultivationProject(models.Model):
                 'uom': self.yield_uom_id.name
             }
             
+            # Collect the note for the responsible user's digest in digest mode
+            if self.env['farm.harvest.notice']._is_digest_enabled():
+                self.env['farm.harvest.notice']._enqueue([(self, 'verification', note)])
+                return True
+
             # Add a note in the chatter
             self.message_post(body=note)
             
@@ -1190,20 +1164,47 @@ class CultivationProject(models.Model):
         qualities = self._get_translated_selection_values('yield_quality')
         return _(qualities.get(quality_code, ''))
     
-    @api.depends('daily_report_ids.irrigation_duration', 'daily_report_ids.state')
+    @api.depends('daily_report_ids.irrigation_duration', 'daily_report_ids.state',
+                 'daily_report_ids.operation_type')
+    @instrumented
     def _compute_total_irrigation_hours(self):
         """Calculate the total irrigation hours from confirmed and done daily reports"""
+        hours = dict(self.filtered('id')._read_irrigation_hours())
         for project in self:
-            total_hours = 0.0
-            # Sum irrigation duration from all confirmed or done daily reports
-            # that have operation_type = 'irrigation'
-            reports = self.env['farm.daily.report'].search([
-                ('project_id', '=', project.id),
+            project.total_irrigation_hours = hours.get(project, 0.0) if project.id else 0.0
+
+    def _read_irrigation_hours(self, groupby=()):
+        """Return the irrigation hours of confirmed and done reports of the projects.
+
+        Reads a single grouped aggregate on (project, *groupby) and returns its
+        rows, e.g. ``(project, hours)`` or ``(project, field, week, hours)``.
+        """
+        if not self:
+            return []
+        return self.env['farm.daily.report']._read_group(
+            [
+                ('project_id', 'in', self.ids),
                 ('operation_type', '=', 'irrigation'),
                 ('state', 'in', ['confirmed', 'done']),
-            ])
-            
-            if reports:
-                total_hours = sum(report.irrigation_duration for report in reports)
-                
-            project.total_irrigation_hours = total_hours
+            ],
+            groupby=['project_id', *groupby],
+            aggregates=['irrigation_duration:sum'],
+        )
+
+    def get_weekly_irrigation_hours(self):
+        """Return the irrigation hours per project, field and week, for the water allocation board.
+
+        Returns:
+            list: dicts with project_id, field_id, week (first day, as a date
+            string) and hours, ordered by week
+        """
+        rows = self._read_irrigation_hours(groupby=['field_id', 'date:week'])
+        return sorted((
+            {
+                'project_id': project.id,
+                'field_id': field.id,
+                'week': fields.Date.to_string(week),
+                'hours': hours,
+            }
+            for project, field, week, hours in rows
+        ), key=lambda row: (row['week'], row['project_id']))
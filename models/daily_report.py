@@ -1,10 +1,20 @@
 from odoo import fields, models, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools import date_utils, LRU
+from odoo.tools.sql import create_index
+from collections import defaultdict
 from datetime import date
+from .farm_perf_sample import instrumented
 import logging
+import time
 
 _logger = logging.getLogger(__name__)
 
+# Short-lived cache of the per-product stock figures used when evaluating lines
+# being edited, keyed by database, kind, company and product
+_LINE_EVALUATION_CACHE = LRU(4096)
+_LINE_EVALUATION_TTL = 30  # seconds
+
 
 class DailyReport(models.Model):
     _name = 'farm.daily.report'
@@ -55,6 +65,7 @@ class DailyReport(models.Model):
     # Report status
     state = fields.Selection([
         ('draft', 'Draft'),
+        ('confirming', 'Confirming'),
         ('confirmed', 'Confirmed'),
         ('done', 'Done'),
     ], string='Status', default='draft', tracking=True)
@@ -85,6 +96,9 @@ class DailyReport(models.Model):
     stock_move_ids = fields.One2many('stock.move', 'daily_report_id', string='Stock Moves')
     stock_picking_id = fields.Many2one('stock.picking', string='Inventory Operation')
     
+    # Background confirmation jobs
+    job_ids = fields.One2many('farm.job', 'report_id', string='Background Jobs')
+    
     # Analytic accounting
     analytic_line_ids = fields.One2many('account.analytic.line', 'daily_report_id', 
                                       string='Analytic Lines')
@@ -128,17 +142,30 @@ class DailyReport(models.Model):
         currency_field='currency_id'
     )
     
-    @api.depends('vendor_bill_ids')
+    @api.depends('vendor_bill_ids', 'labor_machinery_lines.vendor_bill_id')
     def _compute_vendor_bill_count(self):
         """Compute the number of generated vendor bills"""
         for report in self:
-            report.vendor_bill_count = len(report.vendor_bill_ids)
+            report.vendor_bill_count = len(report._get_vendor_bills())
     
-    @api.depends('vendor_bill_ids.amount_total')
+    @api.depends('vendor_bill_ids.amount_total', 'labor_machinery_lines.vendor_bill_id.amount_total')
     def _compute_vendor_bill_total(self):
         """Compute total amount of all generated bills"""
         for report in self:
-            report.total_bill_amount = sum(report.vendor_bill_ids.mapped('amount_total'))
+            report.total_bill_amount = sum(report._get_vendor_bills().mapped('amount_total'))
+
+    def _get_vendor_bills(self):
+        """Return the bills of the report, including period bills shared with other reports"""
+        self.ensure_one()
+        return self.vendor_bill_ids | self.labor_machinery_lines.vendor_bill_id
+
+    def init(self):
+        """Index the counted irrigation reports for the project irrigation totals"""
+        create_index(
+            self.env.cr, 'farm_daily_report_irrigation_index', self._table,
+            ['project_id', 'date', 'irrigation_duration'],
+            where="operation_type = 'irrigation' AND state IN ('confirmed', 'done')",
+        )
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -147,6 +174,34 @@ class DailyReport(models.Model):
             if vals.get('name', 'New') == 'New':
                 vals['name'] = self.env['ir.sequence'].next_by_code('farm.daily.report') or 'New'
         return super().create(vals_list)
+
+    def write(self, vals):
+        """Refresh the remaining quantities of the purchase lines consumed by the reports
+        and the KPI snapshots of the reports entering or leaving the done state"""
+        completed = reopened = self.browse()
+        if 'state' in vals:
+            if vals['state'] == 'done':
+                completed = self.filtered(lambda r: r.state != 'done')
+            else:
+                reopened = self.filtered(lambda r: r.state == 'done')
+        result = super().write(vals)
+        if 'state' in vals:
+            po_lines = self.labor_machinery_lines.purchase_order_line_id
+            if po_lines:
+                self.env['farm.service.po.line']._refresh(po_lines)
+            Kpi = self.env['farm.project.kpi']
+            if reopened:
+                Kpi._reverse([('report_id', 'in', reopened.ids)])
+            Kpi._record_reports(completed)
+        return result
+
+    def unlink(self):
+        """Give the quantities consumed by deleted reports back to their purchase lines"""
+        po_lines = self.labor_machinery_lines.purchase_order_line_id
+        result = super().unlink()
+        if po_lines:
+            self.env['farm.service.po.line']._refresh(po_lines)
+        return result
     
     @api.onchange('project_id', 'operation_type')
     def _onchange_project_id(self):
@@ -177,8 +232,7 @@ class DailyReport(models.Model):
             if bom_line:
                     # Create a new product line with the found product
                     # Determine which field to use based on the product category
-                    category_name = bom_line.product_id.categ_id.name
-                    if category_name in ['Labor Services', 'Machinery']:
+                    if bom_line.product_id.farm_line_type == 'labor_machinery':
                         field_name = 'labor_machinery_lines'
                         line_type = 'labor_machinery'
                     else:
@@ -244,104 +298,65 @@ class DailyReport(models.Model):
             other_product_cost = sum(line.actual_cost for line in report.other_product_lines)
             report.actual_cost = labor_machinery_cost + other_product_cost
             
+    @instrumented
     def action_confirm(self):
-        """Confirm the daily report and create stock moves and vendor bills"""
-        for report in self:
-            _logger.info(f"DEBUG: Starting confirmation for report {report.name}")
-            
-            # Check if there's sufficient stock for stockable/consumable products only
-            all_product_lines = report.labor_machinery_lines + report.other_product_lines
-            stockable_lines = all_product_lines.filtered(
-                lambda l: l.product_id and l.product_id.type in ['combo', 'consu']
-            )
-            
-            if stockable_lines:
-                unavailable_products = []
-                
-                # Check stock availability for stockable/consumable products
-                for line in stockable_lines:
-                    # Check if we have enough quantity available (available_stock is computed automatically)
-                    if line.quantity > line.available_stock:
-                        unavailable_products.append({
-                            'name': line.product_id.name,
-                            'requested': line.quantity,
-                            'available': line.available_stock,
-                            'uom': line.uom_id.name
-                        })
-                
-                # If any products are unavailable, show a validation error
-                if unavailable_products:
-                    error_msgs = self.get_translated_error_messages()
-                    error_message = error_msgs['insufficient_inventory']
-                    for product in unavailable_products:
-                        error_message += error_msgs['inventory_line_error'] % (
-                            product['name'], product['requested'], product['uom'],
-                            product['available'], product['uom']
-                        )
-                    raise ValidationError(error_message)
-            
-            # FIRST: Set state to confirmed
-            # _logger.info(f"DEBUG: Setting state to confirmed for report {report.name}")
-            # try:
-            #     report.with_context(force_write=True).write({'state': 'confirmed'})
-            #     _logger.info(f"DEBUG: State successfully updated to: {report.state}")
-            # except Exception as e:
-            #     _logger.error(f"DEBUG: Failed to update state: {str(e)}")
-            #     # Try without context
-            #     report.write({'state': 'confirmed'})
-            #     _logger.info(f"DEBUG: State updated without context to: {report.state}")
-            
-            # SECOND: Generate vendor bills for labor and machinery services
-            generated_bills = []
-            if report.labor_machinery_lines:
+        """Confirm the daily reports and create stock moves and vendor bills.
+
+        The whole recordset is confirmed at once: stock availability is checked
+        with one grouped quantity computation, the pickings and moves of all
+        reports are created in batches and the state is written once.
+        """
+        reports = self.filtered(lambda r: r.state == 'draft')
+        if not reports:
+            return {'type': 'ir.actions.act_window_close'}
+
+        # In asynchronous mode the work is handed over to the job queue
+        if not self.env.context.get('farm_job_run') and reports._use_async_confirmation():
+            return reports._enqueue_confirmation()
+
+        _logger.debug("Starting confirmation for %s report(s)", len(reports))
+
+        # FIRST: Check stock for all stockable/consumable lines of all reports
+        reports._check_stock_availability()
+
+        # SECOND: Generate vendor bills for labor and machinery services.
+        # In consolidated mode the lines are billed later, per period.
+        generated_bills = []
+        if self._get_billing_mode() == 'per_report':
+            for report in reports:
                 # Check if any lines have PO data
-                po_lines = report.labor_machinery_lines.filtered(lambda l: l.purchase_order_line_id)
-                if po_lines:
-                    generated_bills = report._generate_vendor_bills_for_services()
-            
-            # THIRD: Handle stock movements if needed
-            stockable_lines = all_product_lines.filtered(
-                lambda l: l.product_id.type in ['combo', 'consu'] and l.quantity > 0
-            )
-            
-            if stockable_lines and not report.stock_picking_id:
-                _logger.info(f"DEBUG: Creating stock movements for {len(stockable_lines)} stockable lines")
-                report._create_stock_movements()
-            
-            # FOURTH: Force update PO fields and calculate costs directly
-            for line in report.labor_machinery_lines + report.other_product_lines:
-                if line.line_type == 'labor_machinery' and line.purchase_order_line_id:
-
-                    # Direct calculation and update for labor/machinery lines
-                    po_line = line.purchase_order_line_id
-                    po_price = po_line.price_unit
-                    vendor = po_line.order_id.partner_id
-                    calculated_cost = po_price * line.quantity
-                    
-                    # Direct write of all PO-related fields
-                    line.with_context(force_write=True).write({
-                        'po_unit_price': po_price,
-                        'vendor_id': vendor.id,
-                        'purchase_order_id': po_line.order_id.id,
-                        'actual_cost': calculated_cost
-                    })
-                                        
-                    _logger.info(f"DEBUG: Updated line {line.id} - PO Price: {line.po_unit_price}, Cost: {line.actual_cost}")
-                else:
-                    # For other product lines, use standard computation
-                    line.with_context(force_write=True)._compute_actual_cost()
-            
-            # Force refresh to show updated field values
-            # report.invalidate_recordset()
-            
-            # Set state to confirmed for this report
-            _logger.info(f"DEBUG: Setting state to confirmed for report {report.name}")
-            report.with_context(force_write=True).write({'state': 'confirmed'})
-            
-            _logger.info(f"DEBUG: Confirmation completed for report {report.name}, final state: {report.state}")
-        
+                if report.labor_machinery_lines.filtered(lambda l: l.purchase_order_line_id):
+                    generated_bills += report._generate_vendor_bills_for_services()
+
+        # THIRD: Handle stock movements for every report without a picking
+        reports.filtered(lambda r: not r.stock_picking_id)._create_stock_movements()
+
+        # FOURTH: Force update PO fields and calculate costs directly
+        all_product_lines = reports.labor_machinery_lines | reports.other_product_lines
+        po_lines = all_product_lines.filtered(
+            lambda l: l.line_type == 'labor_machinery' and l.purchase_order_line_id
+        )
+        # Lines sharing the same PO line and quantity get identical values,
+        # so they are written together
+        po_line_groups = defaultdict(lambda: self.env['farm.daily.report.line'])
+        for line in po_lines:
+            po_line_groups[(line.purchase_order_line_id, line.quantity)] |= line
+        for (po_line, quantity), lines in po_line_groups.items():
+            lines.with_context(force_write=True).write({
+                'po_unit_price': po_line.price_unit,
+                'vendor_id': po_line.order_id.partner_id.id,
+                'purchase_order_id': po_line.order_id.id,
+                'actual_cost': po_line.price_unit * quantity,
+            })
+        # For other product lines, use standard computation
+        (all_product_lines - po_lines).with_context(force_write=True)._compute_actual_cost()
+
+        # Set state to confirmed for all reports in one write
+        reports.with_context(force_write=True).write({'state': 'confirmed'})
+        _logger.debug("Confirmation completed for reports %s", reports.ids)
+
         # Show notification if bills were generated
-        total_bills = sum(len(generated_bills) for generated_bills in [generated_bills] if generated_bills)
+        total_bills = len(generated_bills)
         if total_bills > 0:
             message = _("%d vendor bill(s) generated successfully") % total_bills
             return {
@@ -355,24 +370,95 @@ class DailyReport(models.Model):
                     'next': {'type': 'ir.actions.act_window_close'}
                 }
             }
-        
+
         # If no bills generated, just close/refresh
         return {'type': 'ir.actions.act_window_close'}
+
+    @api.model
+    def _use_async_confirmation(self):
+        """Return whether report confirmation runs in background jobs"""
+        return bool(self.env['ir.config_parameter'].sudo().get_param('farm_management.async_confirmation'))
+
+    def _enqueue_confirmation(self):
+        """Move the reports to 'confirming' and queue one confirmation job per report"""
+        # Fail fast on missing stock, the user is still waiting for an answer
+        self._check_stock_availability()
+        self.with_context(force_write=True).write({'state': 'confirming'})
+        self.env['farm.job']._enqueue([{
+            'name': _("Confirm %s") % report.name,
+            'job_type': 'confirm_report',
+            'report_id': report.id,
+            'company_id': report.company_id.id or self.env.company.id,
+        } for report in self])
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Daily Report Confirmation Queued'),
+                'message': _("%d report(s) will be confirmed in the background") % len(self),
+                'type': 'info',
+                'sticky': False,
+                'next': {'type': 'ir.actions.act_window_close'}
+            }
+        }
+
+    @instrumented
+    def _check_stock_availability(self):
+        """Raise if the consumable lines of the reports exceed the stock on hand.
+
+        Requested quantities are summed per (company, product) over all the
+        reports, so several reports consuming the same product are checked
+        against the same stock.
+        """
+        lines = (self.labor_machinery_lines | self.other_product_lines).filtered(
+            lambda l: l.product_id and l.product_id.type == 'consu' and l.quantity > 0
+        )
+        if not lines:
+            return
+
+        available_quantities = lines._get_available_quantities()
+        requested = defaultdict(float)
+        products = {}
+        for line in lines:
+            key = (line._get_stock_company_id(), line.product_id.id)
+            requested[key] += line.quantity
+            products[key] = line.product_id
+
+        unavailable_products = []
+        for key, quantity in requested.items():
+            available = available_quantities.get(key, 0.0)
+            if quantity > available:
+                unavailable_products.append({
+                    'name': products[key].name,
+                    'requested': quantity,
+                    'available': available,
+                    'uom': products[key].uom_id.name
+                })
+
+        # If any products are unavailable, show a validation error
+        if unavailable_products:
+            error_msgs = self.get_translated_error_messages()
+            error_message = error_msgs['insufficient_inventory']
+            for product in unavailable_products:
+                error_message += error_msgs['inventory_line_error'] % (
+                    product['name'], product['requested'], product['uom'],
+                    product['available'], product['uom']
+                )
+            raise ValidationError(error_message)
     
     def action_set_to_done(self):
-        """Set report to done and update analytic accounting"""
-        for report in self:
-            # Create analytic entries if they don't exist yet
-            if not report.analytic_line_ids:
-                report._create_analytic_entries()
-                
-            # Update project actual cost
-            report._update_project_cost()
+        """Set reports to done and update analytic accounting"""
+        # Create analytic entries of all reports that don't have them yet in one batch
+        self.filtered(lambda r: not r.analytic_line_ids)._create_analytic_entries()
             
-            # Use force_write context to bypass field protection
-            report.with_context(force_write=True).write({'state': 'done'})
+        # Update project actual cost
+        self._update_project_cost()
+        
+        # Use force_write context to bypass field protection
+        self.with_context(force_write=True).write({'state': 'done'})
         return True
     
+    @instrumented
     def action_reset_to_draft(self):
         """Reset to draft and delete any stock moves and analytic entries"""
         for report in self:
@@ -389,172 +475,89 @@ class DailyReport(models.Model):
             report.with_context(force_write=True).write({'state': 'draft'})
         return True
     
+    def _get_stock_movement_locations(self):
+        """Return the (source location, destination location, picking type) used
+        for the consumption picking of this report"""
+        self.ensure_one()
+        report = self
+
+        # Use warehouse stock location as source (just like in sales orders)
+        source_location = self.env['stock.warehouse']._get_farm_stock_location(report.company_id.id)
+
+        # Still keep track of farm location for references, but don't use it as source
+        farm_location = report.project_id.farm_id.location_id
+        if not farm_location:
+            # Auto-create a location for the farm if missing
+            parent_location = self.env.ref('stock.stock_location_locations', raise_if_not_found=False)
+            if not parent_location:
+                parent_location = self.env['stock.location'].search([('usage', '=', 'view')], limit=1)
+
+            if not parent_location:
+                error_msgs = report.get_translated_error_messages()
+                raise ValidationError(error_msgs['no_parent_location'])
+
+            farm_location = self.env['stock.location'].create({
+                'name': report.project_id.farm_id.name,
+                'usage': 'internal',
+                'location_id': parent_location.id,
+                'company_id': report.project_id.farm_id.company_id.id,
+            })
+            # Update the farm record
+            report.project_id.farm_id.location_id = farm_location.id
+
+        # Farm → Field → Project location (the actual destination)
+        dest_location = report.project_id._get_stock_location()
+
+        # Use the outgoing/delivery picking type (resolved once per company)
+        picking_type = self.env['stock.picking.type']._get_farm_picking_type(
+            report.company_id.id, 'consumption', dest_location
+        )
+
+        return source_location, dest_location, picking_type
+
+    @instrumented
     def _create_stock_movements(self):
-        """Create delivery stock moves for the products used in the report using outgoing delivery orders"""
+        """Create delivery stock moves for the products used in the reports using outgoing delivery orders.
+
+        Runs as a batch pipeline over all reports: pickings are created in one
+        call, their stock moves in a second one, then all pickings are
+        confirmed and reserved together and the missing move lines are
+        created in a single call.
+        """
+        picking_vals_list = []
+        picking_reports = []
         for report in self:
             all_product_lines = report.labor_machinery_lines + report.other_product_lines
             if not all_product_lines:
                 continue
-                
-            # Find the warehouse first
-            warehouse = self.env['stock.warehouse'].search([('company_id', '=', report.company_id.id)], limit=1)
-            if not warehouse:
-                error_msgs = report.get_translated_error_messages()
-                raise ValidationError(error_msgs['no_warehouse'])
-            
-            # Use warehouse stock location as source (just like in sales orders)
-            source_location = warehouse.lot_stock_id
-            if not source_location:
-                source_location = self.env.ref('stock.stock_location_stock', raise_if_not_found=False)
-                if not source_location:
-                    source_location = self.env['stock.location'].search([
-                        ('usage', '=', 'internal'),
-                        ('company_id', '=', report.company_id.id),
-                        ('name', 'ilike', 'Stock')
-                    ], limit=1)
-            
-            if not source_location:
-                error_msgs = report.get_translated_error_messages()
-                raise ValidationError(error_msgs['no_stock_location'])
-                
-            # Still keep track of farm location for references, but don't use it as source
-            farm_location = report.project_id.farm_id.location_id
-            if not farm_location:
-                # Auto-create a location for the farm if missing
-                parent_location = self.env.ref('stock.stock_location_locations', raise_if_not_found=False)
-                if not parent_location:
-                    parent_location = self.env['stock.location'].search([('usage', '=', 'view')], limit=1)
-                
-                if not parent_location:
-                    error_msgs = report.get_translated_error_messages()
-                    raise ValidationError(error_msgs['no_parent_location'])
-                    
-                farm_location = self.env['stock.location'].create({
-                    'name': report.project_id.farm_id.name,
-                    'usage': 'internal',
-                    'location_id': parent_location.id,
-                    'company_id': report.project_id.farm_id.company_id.id,
-                })
-                # Update the farm record
-                report.project_id.farm_id.location_id = farm_location.id
-            
-            # Create a clean hierarchical location structure: Farm → Field → Project
-            # Get the Physical Locations parent
-            physical_locations = self.env.ref('stock.stock_location_locations', raise_if_not_found=False)
-            if not physical_locations:
-                physical_locations = self.env['stock.location'].search([
-                    ('name', '=', 'Physical Locations'),
-                    ('usage', '=', 'view')
-                ], limit=1)
-                
-            if not physical_locations:
-                error_msgs = report.get_translated_error_messages()
-                raise ValidationError(error_msgs['no_physical_locations'])
-            
-            # 1. Create or find farm-level location (directly under Physical Locations)
-            farm_name = report.farm_id.name
-            farm_dest_location = self.env['stock.location'].search([
-                ('name', '=', f"Farm: {farm_name}"),
-                ('location_id', '=', physical_locations.id),
-                ('company_id', '=', report.company_id.id)
-            ], limit=1)
-            
-            if not farm_dest_location:
-                farm_dest_location = self.env['stock.location'].create({
-                    'name': f"Farm: {farm_name}",
-                    'usage': 'production',  # Using production type for farm operations
-                    'location_id': physical_locations.id,
-                    'company_id': report.company_id.id,
-                })
-            
-            # 2. Create or find field-level location under farm
-            field_name = report.field_id.name
-            field_dest_location = self.env['stock.location'].search([
-                ('name', '=', f"Field: {field_name}"),
-                ('location_id', '=', farm_dest_location.id),
-                ('company_id', '=', report.company_id.id)
-            ], limit=1)
-            
-            if not field_dest_location:
-                field_dest_location = self.env['stock.location'].create({
-                    'name': f"Field: {field_name}",
-                    'usage': 'production',  # Using production type for field operations
-                    'location_id': farm_dest_location.id,
-                    'company_id': report.company_id.id,
-                })
-            
-            # 3. Create or find project-level location (the actual destination)
-            project_name = report.project_id.name 
-            crop_name = report.crop_id.name if report.crop_id else 'N/A'
-            project_crop_name = f"Project: {project_name} - {crop_name}"
-            dest_location = self.env['stock.location'].search([
-                ('name', '=', project_crop_name),
-                ('location_id', '=', field_dest_location.id),
-                ('company_id', '=', report.company_id.id)
-            ], limit=1)
-            
-            if not dest_location:
-                dest_location = self.env['stock.location'].create({
-                    'name': project_crop_name,
-                    'usage': 'production',  # Using production type for project operations
-                    'location_id': field_dest_location.id,
-                    'company_id': report.company_id.id,
-                })
-            
-            # Find the warehouse
-            warehouse = self.env['stock.warehouse'].search([('company_id', '=', report.company_id.id)], limit=1)
-            if not warehouse:
-                error_msgs = report.get_translated_error_messages()
-                raise ValidationError(error_msgs['no_warehouse'])
-                
-            # Use the outgoing/delivery picking type
-            picking_type = warehouse.out_type_id
-            
-            if not picking_type:
-                # Fall back to any outgoing picking type
-                picking_type = self.env['stock.picking.type'].search([
-                    ('code', '=', 'outgoing'),
-                    ('warehouse_id', '=', warehouse.id)
-                ], limit=1)
-            
-            if not picking_type:
-                # Create a new outgoing picking type for farm operations
-                # Use standard sequence format (WH/OUT/000) but with farm-specific default locations
-                sequence = self.env['ir.sequence'].search([
-                    ('code', '=', 'stock.picking.out'),
-                    ('company_id', '=', report.company_id.id)
-                ], limit=1)
-                
-                if not sequence:
-                    sequence = self.env['ir.sequence'].create({
-                        'name': 'Stock Outgoing',
-                        'code': 'stock.picking.out',
-                        'prefix': 'WH/OUT/',
-                        'padding': 5,
-                        'company_id': report.company_id.id,
-                    })
-                
-                picking_type = self.env['stock.picking.type'].create({
-                    'name': 'Farm Operations',
-                    'code': 'outgoing',
-                    'sequence_code': 'OUT',
-                    'default_location_src_id': source_location.id,  # From warehouse stock
-                    'default_location_dest_id': dest_location.id,   # To farm-specific location
-                    'sequence_id': sequence.id,
-                    'warehouse_id': warehouse.id,
-                    'company_id': report.company_id.id,
-                })
-            
+
+            # Filter product lines to only include stockable/consumable products with quantity > 0
+            valid_lines = all_product_lines.filtered(
+                lambda l: l.product_id.type == 'consu' and l.quantity > 0
+            )
+
+            # If no valid lines exist, don't create an empty picking
+            if not valid_lines:
+                # Log that no inventory movement was needed
+                report.message_post(
+                    body=_("No inventory movement required - report contains only service/labor items or zero quantities"),
+                    message_type='notification'
+                )
+                _logger.debug("No inventory movement created for report %s - no stockable products", report.name)
+                continue
+
+            source_location, dest_location, picking_type = report._get_stock_movement_locations()
+
             # Create a delivery order (outgoing) for farm consumption
             operation_name = dict(report._fields['operation_type'].selection).get(report.operation_type, 'Consumption')
-            
+
             # Get descriptive information for reference in the note
             field_name = report.field_id.name if report.field_id else "N/A"
             project_name = report.project_id.name or "N/A"
             crop_name = report.crop_id.name if report.crop_id else "N/A"
-            
-            # Create the picking - don't set 'name' to let Odoo use the sequence (WH/OUT/000...)
-            picking_vals = {
+
+            # Don't set 'name' to let Odoo use the sequence (WH/OUT/000...)
+            picking_vals_list.append({
                 'location_id': source_location.id,  # Use warehouse stock location as source
                 'location_dest_id': dest_location.id,
                 'picking_type_id': picking_type.id,
@@ -564,337 +567,194 @@ class DailyReport(models.Model):
                 'move_type': 'direct',  # Direct transfer (as opposed to 'one' which is partial)
                 'partner_id': False,  # No partner is fine for farm operations
                 'note': f"Farm/{field_name}/{project_name} - {crop_name} - {operation_name}",
-                # Don't set name - let Odoo use the standard sequence (WH/OUT/000)
-            }
-            
-            picking = self.env['stock.picking'].create(picking_vals)
+            })
+            picking_reports.append((report, valid_lines))
+
+        if not picking_vals_list:
+            return
+
+        pickings = self.env['stock.picking'].create(picking_vals_list)
+
+        # Build the stock moves of every picking and create them together
+        move_vals_list = []
+        for (report, valid_lines), picking in zip(picking_reports, pickings):
             report.stock_picking_id = picking.id
-            
-            # Log the inventory movement creation
-            report.message_post(
-                body=_("📦 Inventory Movement Created\n\n"
+            move_vals_list += [report._prepare_stock_move_vals(line, picking) for line in valid_lines]
+        moves = self.env['stock.move'].create(move_vals_list)
+
+        # Confirm all pickings to make products show as "outgoing" in inventory,
+        # then try to reserve quantities, each in one call for the whole batch
+        pickings.action_confirm()
+        pickings.action_assign()
+
+        # Create move lines for the moves that could not be reserved, to make
+        # validation easier later, and set quantities on empty move lines
+        move_line_vals_list = []
+        empty_move_lines = defaultdict(lambda: self.env['stock.move.line'])
+        for move in moves:
+            if not move.move_line_ids:
+                move_line_vals_list.append(self._prepare_stock_move_line_vals(move))
+            else:
+                empty_move_lines[move.product_uom_qty] |= move.move_line_ids.filtered(lambda ml: ml.quantity <= 0)
+        if move_line_vals_list:
+            self.env['stock.move.line'].create(move_line_vals_list)
+        for quantity, move_lines in empty_move_lines.items():
+            if move_lines:
+                move_lines.write({'quantity': quantity})
+
+        for (report, _lines), picking in zip(picking_reports, pickings):
+            report._post_stock_movement_message(picking)
+
+    def _prepare_stock_move_vals(self, line, picking):
+        """Return the values of the stock move consuming a report line in a picking"""
+        self.ensure_one()
+        # Include field/project/crop in the move description
+        field_name = self.field_id.name if self.field_id else "N/A"
+        project_name = self.project_id.name or "N/A"
+        return {
+            'name': f"{line.product_id.name}",
+            'product_id': line.product_id.id,
+            'product_uom_qty': line.quantity,
+            'product_uom': line.uom_id.id,
+            'picking_id': picking.id,
+            'location_id': picking.location_id.id,  # Use warehouse stock location as source
+            'location_dest_id': picking.location_dest_id.id,
+            'state': 'draft',
+            'company_id': self.company_id.id,
+            'daily_report_id': self.id,
+            'origin': f'Report {self.name}',
+            'description_picking': f"{line.product_id.name} - Farm/{field_name}/{project_name}",
+        }
+
+    @api.model
+    def _prepare_stock_move_line_vals(self, move):
+        """Return the values of a move line carrying the full quantity of a move"""
+        return {
+            'move_id': move.id,
+            'product_id': move.product_id.id,
+            'product_uom_id': move.product_uom.id,
+            'location_id': move.location_id.id,
+            'location_dest_id': move.location_dest_id.id,
+            'picking_id': move.picking_id.id,
+            'company_id': move.company_id.id,
+            'quantity': move.product_uom_qty,
+        }
+
+    def _post_stock_movement_message(self, picking):
+        """Log the reservation status of the report's consumption picking"""
+        self.ensure_one()
+        _logger.debug("Inventory movement created for report %s: %s", self.name, picking.name)
+
+        available_moves = picking.move_ids.filtered(lambda m: m.state == 'assigned')
+        pending_moves = picking.move_ids - available_moves
+
+        def _format_moves(moves):
+            return ", ".join(f"{move.product_id.name} ({move.product_uom_qty} {move.product_uom.name})"
+                             for move in moves)
+
+        # Log the status but don't auto-validate - this will be done manually
+        if not pending_moves:
+            _logger.debug("Picking %s is ready for manual validation", picking.name)
+            self.message_post(
+                body=_("🚚 Inventory Movement Created Successfully!\n\n"
                       "Picking Reference: %s\n"
-                      "Status: Draft - pending confirmation") % (picking.name,),
+                      "Products: %s\n"
+                      "Status: All products reserved and ready for manual validation\n\n"
+                      "The inventory movement is now ready for processing.") %
+                      (picking.name, _format_moves(picking.move_ids)),
                 message_type='notification'
             )
-            _logger.info(f"Inventory movement created for report {report.name}: {picking.name}")
-            
-            # Create stock moves for the delivery order
-            all_product_lines = report.labor_machinery_lines + report.other_product_lines
-            # Filter product lines to only include stockable/consumable products with quantity > 0
-            valid_lines = all_product_lines.filtered(
-                lambda l: l.product_id.type == 'consu' and l.quantity > 0
+        else:
+            _logger.debug("Picking %s is partially ready for manual validation", picking.name)
+            self.message_post(
+                body=_("⚠️ Inventory Movement Created with Partial Availability\n\n"
+                      "Picking Reference: %s\n"
+                      "Available Products: %s\n"
+                      "Pending Products: %s\n\n"
+                      "Action Required: Check stock availability before validation.\n"
+                      "Some products may need restocking.") %
+                      (picking.name, _format_moves(available_moves) or "None", _format_moves(pending_moves)),
+                message_type='notification'
             )
-            
-            # If no valid lines exist, don't create an empty picking
-            if not valid_lines:
-                # If a picking was already created but has no valid moves, unlink it
-                if picking:
-                    picking.unlink()
-                    report.stock_picking_id = False
-                    # Log that no inventory movement was needed
-                    report.message_post(
-                        body=_("No inventory movement required - report contains only service/labor items or zero quantities"),
-                        message_type='notification'
-                    )
-                    _logger.info(f"No inventory movement created for report {report.name} - no stockable products")
-                # Update report state with force_write context to bypass restrictions
-                report.with_context(force_write=True).write({
-                    'state': 'confirmed'
-                })
-                continue
-                
-            for line in valid_lines:
-                    
-                operation_name = dict(report._fields['operation_type'].selection).get(report.operation_type, 'Consumption')
-                
-                # Include field/project/crop in the move description
-                field_name = report.field_id.name if report.field_id else "N/A"
-                project_name = report.project_id.name or "N/A"
-                crop_name = report.crop_id.name if report.crop_id else "N/A"
-                
-                move_vals = {
-                    'name': f"{line.product_id.name}",
-                    'product_id': line.product_id.id,
-                    'product_uom_qty': line.quantity,
-                    'product_uom': line.uom_id.id,
-                    'picking_id': picking.id,
-                    'location_id': source_location.id,  # Use warehouse stock location as source
-                    'location_dest_id': dest_location.id,
-                    'state': 'draft',
-                    'company_id': report.company_id.id,
-                    'daily_report_id': report.id,
-                    'origin': f'Report {report.name}',
-                    'description_picking': f"{line.product_id.name} - Farm/{field_name}/{project_name}",
-                }
-                
-                self.env['stock.move'].create(move_vals)
-                
-            # Confirm the picking to make products show as "outgoing" in inventory
-            # Only if we have valid moves
-            if picking and picking.move_ids:
-                # Just confirm the picking (will update outgoing quantities automatically)
-                picking.action_confirm()
-                
-                # Try to reserve quantities
-                picking.action_assign()
-                
-                # Log the status but don't auto-validate - this will be done manually
-                if all(move.state == 'assigned' for move in picking.move_ids):
-                    _logger.info(f"Picking {picking.name} is ready for manual validation")
-                    # Log the detailed status in the report
-                    product_list = ", ".join([f"{move.product_id.name} ({move.product_uom_qty} {move.product_uom.name})" 
-                                            for move in picking.move_ids])
-                    report.message_post(
-                        body=_("🚚 Inventory Movement Created Successfully!\n\n"
-                              "Picking Reference: %s\n"
-                              "Products: %s\n"
-                              "Status: All products reserved and ready for manual validation\n\n"
-                              "The inventory movement is now ready for processing.") % 
-                              (picking.name, product_list),
-                        message_type='notification'
-                    )
-                else:
-                    _logger.info(f"Picking {picking.name} is partially ready for manual validation")
-                    # Log partial availability status
-                    available_moves = [move for move in picking.move_ids if move.state == 'assigned']
-                    pending_moves = [move for move in picking.move_ids if move.state != 'assigned']
-                    
-                    available_list = ", ".join([f"{move.product_id.name} ({move.product_uom_qty} {move.product_uom.name})" 
-                                              for move in available_moves]) if available_moves else "None"
-                    pending_list = ", ".join([f"{move.product_id.name} ({move.product_uom_qty} {move.product_uom.name})" 
-                                            for move in pending_moves]) if pending_moves else "None"
-                    
-                    report.message_post(
-                        body=_("⚠️ Inventory Movement Created with Partial Availability\n\n"
-                              "Picking Reference: %s\n"
-                              "Available Products: %s\n"
-                              "Pending Products: %s\n\n"
-                              "Action Required: Check stock availability before validation.\n"
-                              "Some products may need restocking.") % 
-                              (picking.name, available_list, pending_list),
-                        message_type='notification'
-                    )
-                    
-                # Create move lines to make validation easier later
-                for move in picking.move_ids:
-                    if not move.move_line_ids:
-                        # Create move lines manually with basic values
-                        move_line_vals = {
-                            'move_id': move.id,
-                            'product_id': move.product_id.id,
-                            'product_uom_id': move.product_uom.id,
-                            'location_id': move.location_id.id,
-                            'location_dest_id': move.location_dest_id.id,
-                            'picking_id': move.picking_id.id,
-                            'company_id': move.company_id.id,
-                            'quantity': move.product_uom_qty,
-                            'reserved_quantity': move.reserved_availability,
-                        }
-                        self.env['stock.move.line'].create(move_line_vals)
-                        
-                    # Set quantities on move lines
-                    for line in move.move_line_ids:
-                        if line.quantity <= 0:
-                            line.quantity = move.product_uom_qty
-                            
-                # Update report state with force_write context to bypass restrictions
-                report.with_context(force_write=True).write({
-                    'state': 'confirmed'
-                })
     
+    @instrumented
     def _create_analytic_entries(self):
-        """Create analytic entries for costs related to the daily report"""
-        for report in self:
-            # Get the analytic account from the cultivation project's analytic_account_id field
-            # not from project.project which doesn't have this field in Odoo v18
-            if not report.project_id or not report.project_id.analytic_account_id:
+        """Create analytic entries for costs related to the daily reports.
+
+        Works on the whole recordset: the done stock moves of all reports are
+        read with one search, their valuation layers with one grouped read, and
+        every analytic line is created in a single batch.
+        """
+        reports = self.filtered(lambda r: r.project_id.analytic_account_id)
+        if not reports:
+            return self.env['account.analytic.line']
+
+        all_product_lines = reports.labor_machinery_lines | reports.other_product_lines
+        # Force recompute of actual cost to ensure it's properly calculated
+        all_product_lines.with_context(force_write=True)._compute_actual_cost()
+
+        # Preload the validated stock moves of all reports and value them in one pass
+        resolver = self.env['farm.cost.resolver']
+        moves_by_key = resolver._get_done_moves(reports)
+        unit_costs = resolver._get_unit_costs(moves_by_key)
+
+        vals_list = []
+        for line in all_product_lines:
+            report = line.report_id
+
+            # Calculate the product cost - make sure it's never zero for used products
+            product_cost = line.actual_cost
+            if product_cost <= 0 and line.quantity > 0:
+                # If actual cost is zero but product is used, use the product's standard price,
+                # then a minimal value of 1.0 per unit so that an entry is still created
+                product_cost = line.product_id.standard_price * line.quantity or line.quantity * 1.0
+            if product_cost <= 0:
                 continue
-                
-            analytic_account = report.project_id.analytic_account_id
-            
-            # Create analytic line for each type of cost
-            
-            # 1. Product costs
-            all_product_lines = report.labor_machinery_lines + report.other_product_lines
-            for line in all_product_lines:
-                # Force recompute of actual cost to ensure it's properly calculated
-                line.with_context(force_write=True)._compute_actual_cost()
-                
-                # Calculate the product cost - make sure it's never zero for used products
-                product_cost = line.actual_cost
-                if product_cost <= 0 and line.quantity > 0:
-                    # If actual cost is zero but product is used, use a fallback cost
-                    # Try to get a reasonable cost from the product's standard price
-                    product_cost = line.product_id.standard_price * line.quantity
-                    _logger.warning(f"Using fallback cost calculation for {line.product_id.name}: {product_cost}")
-                
-                # For products that have no cost elsewhere in the system, we need to ensure we use
-                # a minimal cost value to ensure analytic entries are created
-                if product_cost <= 0 and line.quantity > 0:
-                    # Set minimum default value (1.0 per unit) if all other cost calculations fail
-                    product_cost = line.quantity * 1.0
-                    _logger.warning(f"Using minimum default cost of 1.0/unit for {line.product_id.name}: {product_cost}")
-                
-                if product_cost <= 0:
-                    _logger.warning(f"Skipping analytic entry for product {line.product_id.name} with zero cost")
-                    continue
-                    
-                # Look for validated stock moves for this product to get actual cost
-                stock_cost = 0.0
-                validated_moves = self.env['stock.move'].search([
-                    ('daily_report_id', '=', report.id),
-                    ('product_id', '=', line.product_id.id),
-                    ('state', '=', 'done')
-                ], order='date desc')
-                
-                if validated_moves:
-                    # Calculate actual cost from validated stock moves
-                    stock_qty = sum(move.product_uom_qty for move in validated_moves)
-                    if stock_qty > 0:
-                        # Try to get actual cost
-                        try:
-                            # Try different approaches to get the actual cost from stock moves in Odoo 18
-                            
-                            # First approach: Get cost from accounting entries
-                            _logger.info(f"Trying to calculate cost for {line.product_id.name}")
-                            for move in validated_moves:
-                                try:
-                                    if hasattr(move, 'account_move_ids') and move.account_move_ids:
-                                        _logger.info(f"Found account_move_ids for move {move.id}: {move.account_move_ids.ids}")
-                                        # Look for expense lines or credit lines in stock valuation
-                                        expense_lines = move.account_move_ids.mapped('line_ids').filtered(
-                                            lambda l: l.account_id.account_type in ('expense', 'asset_current')
-                                            and l.balance < 0  # Credit entries for stock valuation
-                                        )
-                                        if expense_lines:
-                                            move_cost = sum(abs(l.balance) for l in expense_lines)
-                                            _logger.info(f"Found expense lines with cost: {move_cost}")
-                                            stock_cost += move_cost
-                                except Exception as e:
-                                    _logger.error(f"Error accessing account move data: {str(e)}")
-                            
-                            _logger.info(f"Actual cost from account entries for {line.product_id.name}: {stock_cost}")
-                            
-                            # Second approach: Try to get from stock valuation layer if available
-                            if stock_cost <= 0:
-                                try:
-                                    # Check if the model exists before trying to use it
-                                    if 'stock.valuation.layer' in self.env:
-                                        StockValuationLayer = self.env['stock.valuation.layer']
-                                        layers = StockValuationLayer.search([
-                                            ('stock_move_id', 'in', validated_moves.ids)
-                                        ])
-                                        if layers:
-                                            # Get the absolute value as valuation layers can be negative for outgoing moves
-                                            stock_cost = sum(abs(layer.value) for layer in layers)
-                                            _logger.info(f"Stock valuation layers found: {len(layers)} with total value: {stock_cost}")
-                                            
-                                            # Ensure the cost is distributed correctly if quantities don't match
-                                            layer_qty = sum(layer.quantity for layer in layers)
-                                            if layer_qty and layer_qty != line.quantity:
-                                                unit_cost = stock_cost / abs(layer_qty)
-                                                stock_cost = unit_cost * line.quantity
-                                                _logger.info(f"Adjusting cost to match quantity {line.quantity}: {stock_cost}")
-                                except Exception as val_error:
-                                    _logger.error(f"Error getting valuation layers: {str(val_error)}")
-                            
-                            # Third approach: Try to get unit cost * quantity
-                            if stock_cost <= 0:
-                                try:
-                                    for move in validated_moves:
-                                        # Try various price attributes that might exist
-                                        unit_price = None
-                                        
-                                        # Try product_price_value_unit first (specific to Odoo 18)
-                                        if hasattr(move, 'product_price_value_unit') and move.product_price_value_unit:
-                                            unit_price = move.product_price_value_unit
-                                            _logger.info(f"Found product_price_value_unit: {unit_price}")
-                                        
-                                        # Then try price_unit
-                                        elif hasattr(move, 'price_unit') and move.price_unit:
-                                            unit_price = move.price_unit
-                                            _logger.info(f"Found price_unit: {unit_price}")
-                                            
-                                        # Calculate move cost if we found a price
-                                        if unit_price is not None:
-                                            qty = move.product_qty if hasattr(move, 'product_qty') else move.product_uom_qty
-                                            move_cost = abs(unit_price) * qty
-                                            _logger.info(f"Move {move.id} cost: {unit_price} * {qty} = {move_cost}")
-                                            stock_cost += move_cost
-                                            
-                                    _logger.info(f"Final cost from price_unit calculations: {stock_cost}")
-                                    
-                                    # Match to current line quantity
-                                    total_move_qty = sum(m.product_uom_qty for m in validated_moves)
-                                    if total_move_qty and total_move_qty != line.quantity:
-                                        unit_cost = stock_cost / total_move_qty
-                                        stock_cost = unit_cost * line.quantity
-                                        _logger.info(f"Adjusted cost to match line quantity: {stock_cost}")
-                                except Exception as price_error:
-                                    _logger.error(f"Error calculating cost from price_unit: {str(price_error)}")
-                            
-                            # Last resort: use standard price
-                            if stock_cost <= 0:
-                                std_price = line.product_id.standard_price or 0.0
-                                stock_cost = std_price * line.quantity
-                                _logger.info(f"Using standard price as last resort: {std_price} * {line.quantity} = {stock_cost}")
-                                
-                                # If standard price is also zero, use a minimal value to avoid zero costs
-                                if stock_cost <= 0 and line.quantity > 0:
-                                    stock_cost = line.quantity * 1.0  # Minimum cost of 1.0 per unit
-                                    _logger.info(f"Using minimum default cost of 1.0/unit: {stock_cost}")
-                        except Exception as e:
-                            _logger.error(f"Error calculating stock cost: {str(e)}")
-                            # Even in case of exceptions, try to get a reasonable cost
-                            stock_cost = (line.product_id.standard_price or 1.0) * line.quantity
-                
-                # Determine final cost - prefer actual cost from stock moves, then computed actual cost
-                if stock_cost > 0:
-                    analytic_amount = -stock_cost  # Negative for costs in analytic entries
-                    _logger.info(f"Using validated stock move cost for {line.product_id.name}: {stock_cost}")
-                elif line.actual_cost > 0:
-                    analytic_amount = -line.actual_cost
-                    _logger.info(f"Using computed actual cost for {line.product_id.name}: {line.actual_cost}")
-                else:
-                    # Fall back to product's standard price
-                    std_price = line.product_id.standard_price or 0.0
-                    analytic_amount = -(std_price * line.quantity)
-                    _logger.info(f"Using standard price for {line.product_id.name}: {std_price} x {line.quantity} = {std_price * line.quantity}")
-                
-                # Create the analytic entry
-                operation_type_name = dict(report._fields['operation_type'].selection).get(report.operation_type, 'Operation')
-                entry_vals = {
-                    'name': f"{operation_type_name}: {line.product_id.name} - {report.name}",
-                    'date': report.date,
-                    'account_id': analytic_account.id,
-                    'amount': analytic_amount,  # Negative amount for costs
-                    'unit_amount': line.quantity,
-                    'product_id': line.product_id.id,
-                    'product_uom_id': line.uom_id.id,
-                    'daily_report_id': report.id,
-                }
-                
-                # Add general account if available
-                if line.product_id.categ_id and line.product_id.categ_id.property_account_expense_categ_id:
-                    entry_vals['general_account_id'] = line.product_id.categ_id.property_account_expense_categ_id.id
-                
-                # Add project_id if available
-                if report.project_id.project_id:
-                    entry_vals['project_id'] = report.project_id.project_id.id
-                
-                # Log the values for debugging
-                _logger.info(f"Creating analytic entry with amount: {entry_vals['amount']}, product: {line.product_id.name}")
-                
-                # Create the entry
-                analytic_line = self.env['account.analytic.line'].create(entry_vals)
-                analytic_line.with_context(check_move_validity=False).write({
-                    'amount': analytic_amount
-                })
 
+            # Prefer the actual cost of the validated stock moves
+            key = (report.id, line.product_id.id)
+            stock_cost = 0.0
+            if key in moves_by_key:
+                stock_cost = (
+                    unit_costs.get(key, line.product_id.standard_price) * line.quantity
+                    # Minimal value to avoid zero costs
+                    or line.quantity * 1.0
+                )
+
+            if stock_cost > 0:
+                analytic_amount = -stock_cost  # Negative for costs in analytic entries
+            elif line.actual_cost > 0:
+                analytic_amount = -line.actual_cost
+            else:
+                # Fall back to product's standard price
+                analytic_amount = -((line.product_id.standard_price or 0.0) * line.quantity)
+
+            operation_type_name = dict(report._fields['operation_type'].selection).get(report.operation_type, 'Operation')
+            entry_vals = {
+                'name': f"{operation_type_name}: {line.product_id.name} - {report.name}",
+                'date': report.date,
+                'account_id': report.project_id.analytic_account_id.id,
+                'amount': analytic_amount,  # Negative amount for costs
+                'unit_amount': line.quantity,
+                'product_id': line.product_id.id,
+                'product_uom_id': line.uom_id.id,
+                'daily_report_id': report.id,
+            }
+
+            # Add general account if available
+            if line.product_id.categ_id.property_account_expense_categ_id:
+                entry_vals['general_account_id'] = line.product_id.categ_id.property_account_expense_categ_id.id
+
+            # Add project_id if available
+            if report.project_id.project_id:
+                entry_vals['project_id'] = report.project_id.project_id.id
+
+            vals_list.append(entry_vals)
+
+        analytic_lines = self.env['account.analytic.line'].create(vals_list)
+        _logger.debug("Created %s analytic entries for %s daily report(s)", len(analytic_lines), len(reports))
+        return analytic_lines
 
-            # Labor and machinery costs are now tracked through product lines
-            
     def _update_project_cost(self):
         """Update project's actual cost with costs from this report"""
         for report in self:
@@ -924,12 +784,13 @@ class DailyReport(models.Model):
         """Smart button action to view generated vendor bills"""
         self.ensure_one()
         action = self.env.ref('account.action_move_in_invoice_type').read()[0]
+        vendor_bills = self._get_vendor_bills()
         
-        if len(self.vendor_bill_ids) > 1:
-            action['domain'] = [('id', 'in', self.vendor_bill_ids.ids)]
-        elif len(self.vendor_bill_ids) == 1:
+        if len(vendor_bills) > 1:
+            action['domain'] = [('id', 'in', vendor_bills.ids)]
+        elif len(vendor_bills) == 1:
             action['views'] = [(self.env.ref('account.view_move_form').id, 'form')]
-            action['res_id'] = self.vendor_bill_ids.id
+            action['res_id'] = vendor_bills.id
         else:
             action = {'type': 'ir.actions.act_window_close'}
         
@@ -939,28 +800,18 @@ class DailyReport(models.Model):
         }
         return action
 
+    @instrumented
     def _generate_vendor_bills_for_services(self):
         """Generate vendor bills for labor and machinery services (PO-based only)"""
-        from collections import defaultdict
-        
-        _logger.info(f"DEBUG: Starting bill generation for report {self.name}")
-        
         # Get labor/machinery lines - ALL must have PO lines
         service_lines = self.labor_machinery_lines.filtered(
-            lambda l: l.line_type == 'labor_machinery' and l.purchase_order_line_id
+            lambda l: l.line_type == 'labor_machinery' and l.purchase_order_line_id and not l.vendor_bill_id
         )
-        
-        _logger.info(f"DEBUG: Found {len(service_lines)} service lines for bill generation")
-        _logger.info(f"DEBUG: Total labor_machinery_lines: {len(self.labor_machinery_lines)}")
-        
-        # Debug each line
-        for line in self.labor_machinery_lines:
-            _logger.info(f"DEBUG: Line - Product: {line.product_id.name if line.product_id else 'None'}, "
-                        f"PO Line: {line.purchase_order_line_id.id if line.purchase_order_line_id else 'None'}, "
-                        f"Line Type: {line.line_type}")
+        _logger.debug("Found %s service lines out of %s labor/machinery lines for report %s",
+                      len(service_lines), len(self.labor_machinery_lines), self.name)
         
         if not service_lines:
-            _logger.warning("DEBUG: No service lines with PO found for bill generation")
+            _logger.debug("No service lines with PO found for bill generation")
             return []
         
         # Group by vendor and PO (get vendor from PO, not from line)
@@ -977,11 +828,10 @@ class DailyReport(models.Model):
         # Create one bill per vendor per PO
         for (vendor_id, po_id), lines in vendor_po_groups.items():
             try:
-                _logger.info(f"DEBUG: Creating bill for vendor {vendor_id}, PO {po_id} with {len(lines)} lines")
                 bill = self._create_vendor_bill_for_services(vendor_id, po_id, lines)
                 generated_bills.append(bill)
                 
-                _logger.info(f"DEBUG: Bill created successfully: {bill.name} (ID: {bill.id})")
+                _logger.debug("Bill %s created for vendor %s, PO %s with %s lines", bill.id, vendor_id, po_id, len(lines))
                 
                 # Post message to daily report
                 self.message_post(
@@ -993,10 +843,8 @@ class DailyReport(models.Model):
                     message_type='notification'
                 )
                 
-            except Exception as e:
-                _logger.error(f"Failed to create vendor bill for vendor {vendor_id}, PO {po_id}: {str(e)}")
-                import traceback
-                _logger.error(f"Full traceback: {traceback.format_exc()}")
+            except Exception:
+                _logger.exception("Failed to create vendor bill for vendor %s, PO %s", vendor_id, po_id)
                 continue
         
         return generated_bills
@@ -1007,42 +855,13 @@ class DailyReport(models.Model):
         purchase_order = self.env['purchase.order'].browse(po_id)
         
         # Prepare invoice line values using ONLY PO data
-        invoice_line_vals = []
-        for line in service_lines:
-            # Use product from PO line (guaranteed to exist)
-            product_id = line.purchase_order_line_id.product_id
-            _logger.info(f"DEBUG: Using product from PO line: {product_id.name}")
-            
-            # Get proper expense account
-            account_id = (
-                product_id.property_account_expense_id.id or
-                product_id.categ_id.property_account_expense_categ_id.id or
-                self.env['ir.property']._get('property_account_expense_categ_id', 'product.category').id
-            )
-            
-            # Prepare analytic distribution (Odoo 18 format)
-            analytic_distribution = {}
-            if self.project_id.analytic_account_id:
-                analytic_distribution[str(self.project_id.analytic_account_id.id)] = 100.0
-                _logger.info(f"DEBUG: Setting analytic account: {self.project_id.analytic_account_id.name}")
-            
-            # Use ONLY PO price - no fallbacks
-            price_unit = line.purchase_order_line_id.price_unit
-            _logger.info(f"DEBUG: Using PO price: {price_unit}")
-            
-            line_vals = {
-                'product_id': product_id.id,
-                'name': f"{product_id.name} - {self.name}",
-                'quantity': line.quantity,
-                'price_unit': price_unit,
-                'product_uom_id': product_id.uom_id.id,
-                'account_id': account_id,
-                'analytic_distribution': analytic_distribution,
-                'tax_ids': [(6, 0, product_id.supplier_taxes_id.ids)],
-                'purchase_line_id': line.purchase_order_line_id.id,  # Link to PO line
-            }
-            
-            invoice_line_vals.append((0, 0, line_vals))
+        self.env['farm.bill.account.resolver']._preload(
+            self.env['farm.daily.report.line'].concat(*service_lines).purchase_order_line_id.product_id,
+            self.company_id
+        )
+        invoice_line_vals = [
+            (0, 0, self._prepare_service_invoice_line_vals(line)) for line in service_lines
+        ]
         
         # Create vendor bill following Odoo standards
         bill_vals = {
@@ -1067,18 +886,163 @@ class DailyReport(models.Model):
         
         # Double-check that the partner is correctly set
         if not vendor_bill.partner_id:
-            _logger.error(f"ERROR: Partner not set on vendor bill! Setting manually...")
+            _logger.error("Partner not set on vendor bill %s, setting it manually", vendor_bill.id)
             vendor_bill.partner_id = vendor_id
         
         # Ensure proper sequence number is assigned
         if vendor_bill.name in ['/', False]:
             vendor_bill._compute_name()
         
-        _logger.info(f"DEBUG: Created bill {vendor_bill.name} with partner {vendor_bill.partner_id.name}")
-        _logger.info(f"Created vendor bill {vendor_bill.name} for {vendor.name} from daily report {self.name}")
+        # Mark the lines as billed
+        self.env['farm.daily.report.line'].concat(*service_lines).with_context(
+            force_write=True).write({'vendor_bill_id': vendor_bill.id})
+        
+        _logger.debug("Created vendor bill %s for %s from daily report %s", vendor_bill.name, vendor.name, self.name)
         
         return vendor_bill
 
+    def _prepare_service_invoice_line_vals(self, line):
+        """Prepare the vendor bill line of a labor/machinery line of this report"""
+        self.ensure_one()
+        # Use product from PO line (guaranteed to exist)
+        product_id = line.purchase_order_line_id.product_id
+        
+        # Expense account and taxes, resolved once per product and company
+        account_id, tax_ids = self.env['farm.bill.account.resolver']._resolve(product_id, self.company_id)
+        
+        # Prepare analytic distribution (Odoo 18 format)
+        analytic_distribution = {}
+        if self.project_id.analytic_account_id:
+            analytic_distribution[str(self.project_id.analytic_account_id.id)] = 100.0
+        
+        return {
+            'product_id': product_id.id,
+            'name': f"{product_id.name} - {self.name}",
+            'quantity': line.quantity,
+            # Use ONLY PO price - no fallbacks
+            'price_unit': line.purchase_order_line_id.price_unit,
+            'product_uom_id': product_id.uom_id.id,
+            'account_id': account_id,
+            'analytic_distribution': analytic_distribution,
+            'tax_ids': [(6, 0, tax_ids)],
+            'purchase_line_id': line.purchase_order_line_id.id,  # Link to PO line
+        }
+
+    @api.model
+    def _get_billing_mode(self):
+        """Return 'per_report' or 'consolidated'"""
+        return self.env['ir.config_parameter'].sudo().get_param(
+            'farm_management.billing_mode', 'per_report')
+
+    @api.model
+    def _get_billing_period(self, report_date):
+        """Return the (start, end) dates of the billing period containing report_date"""
+        granularity = self.env['ir.config_parameter'].sudo().get_param(
+            'farm_management.billing_period', 'month')
+        return date_utils.start_of(report_date, granularity), date_utils.end_of(report_date, granularity)
+
+    @instrumented
+    def action_generate_period_bills(self):
+        """Bill the unbilled labor/machinery lines of the selected reports per period"""
+        bills = self._generate_consolidated_vendor_bills()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Vendor Bills'),
+                'message': _("%d vendor bill(s) generated successfully") % len(bills),
+                'type': 'success' if bills else 'info',
+                'sticky': False,
+            }
+        }
+
+    @api.model
+    def _cron_generate_period_bills(self):
+        """Bill the confirmed reports of the billing periods that are over"""
+        if self._get_billing_mode() != 'consolidated':
+            return
+        period_start, dummy = self._get_billing_period(fields.Date.context_today(self))
+        reports = self.search([
+            ('state', 'in', ['confirmed', 'done']),
+            ('date', '<', period_start),
+            ('labor_machinery_lines.purchase_order_line_id', '!=', False),
+            ('labor_machinery_lines.vendor_bill_id', '=', False),
+        ])
+        reports._generate_consolidated_vendor_bills()
+
+    @instrumented
+    def _generate_consolidated_vendor_bills(self):
+        """Create one vendor bill per company, vendor, PO and billing period.
+
+        The unbilled labor/machinery lines of all confirmed reports in self are
+        grouped together and every bill is created in a single batch.
+        """
+        reports = self.filtered(lambda r: r.state in ('confirmed', 'done'))
+        service_lines = reports.labor_machinery_lines.filtered(
+            lambda l: l.line_type == 'labor_machinery'
+            and l.purchase_order_line_id
+            and not l.vendor_bill_id
+        )
+        if not service_lines:
+            return self.env['account.move']
+
+        groups = defaultdict(lambda: self.env['farm.daily.report.line'])
+        for line in service_lines:
+            report = line.report_id
+            purchase_order = line.purchase_order_line_id.order_id
+            period = self._get_billing_period(report.date)
+            groups[(report.company_id, purchase_order.partner_id, purchase_order, period)] |= line
+
+        # Resolve the accounts and taxes of every billed product up front
+        resolver = self.env['farm.bill.account.resolver']
+        for company in service_lines.report_id.company_id:
+            company_lines = service_lines.filtered(lambda l: l.report_id.company_id == company)
+            resolver._preload(company_lines.purchase_order_line_id.product_id, company)
+
+        group_lines = []
+        bill_vals_list = []
+        for (company, vendor, purchase_order, (date_from, date_to)), lines in groups.items():
+            lines = lines.sorted(lambda l: (l.report_id.date, l.report_id.id, l.id))
+            line_reports = lines.report_id
+            bill_date = min(date_to, fields.Date.context_today(self))
+            period_label = f"{date_from} - {date_to}"
+            group_lines.append(lines)
+            bill_vals_list.append({
+                'move_type': 'in_invoice',
+                'partner_id': vendor.id,
+                'invoice_date': bill_date,
+                'date': bill_date,
+                'ref': f"Farm Services - {period_label} - {purchase_order.name}",
+                'invoice_origin': ", ".join(line_reports.mapped('name') + [purchase_order.name]),
+                'currency_id': purchase_order.currency_id.id,
+                'company_id': company.id,
+                'invoice_line_ids': [
+                    (0, 0, line.report_id._prepare_service_invoice_line_vals(line)) for line in lines
+                ],
+                'purchase_id': purchase_order.id,
+                # Only link the report when the bill covers a single one
+                'daily_report_id': line_reports.id if len(line_reports) == 1 else False,
+            })
+
+        bills = self.env['account.move'].with_context(default_move_type='in_invoice').create(bill_vals_list)
+
+        report_bills = defaultdict(lambda: self.env['account.move'])
+        for bill, lines in zip(bills, group_lines):
+            lines.with_context(force_write=True).write({'vendor_bill_id': bill.id})
+            for report in lines.report_id:
+                report_bills[report] |= bill
+
+        for report, report_bill_set in report_bills.items():
+            report.message_post(
+                body=_("Included in period vendor bill(s): %s") % ", ".join(
+                    f"{bill.name} ({bill.partner_id.name})" for bill in report_bill_set
+                ),
+                message_type='notification'
+            )
+
+        _logger.info("Created %s consolidated vendor bill(s) for %s service line(s)", len(bills), len(service_lines))
+        return bills
+
 
 class StockMove(models.Model):
     _inherit = 'stock.move'
@@ -1088,65 +1052,19 @@ class StockMove(models.Model):
                                     index=True, ondelete='set null')
     
     def write(self, vals):
-        """Override write to update daily report state when stock moves are validated"""
+        """Override write to update daily report state when stock moves are validated.
+
+        The affected reports are only queued here; the report reconciler
+        completes them once per transaction, right before commit.
+        """
         result = super(StockMove, self).write(vals)
         
         # If state changed to 'done', update associated daily report
-        if 'state' in vals and vals['state'] == 'done':
-            # Get all unique daily reports from these moves
-            report_ids = self.mapped('daily_report_id')
-            
-            if report_ids:
-                # Log the state change for debugging
-                _logger.info(f"Stock moves validated for daily reports: {report_ids.mapped('name')}")
-                
-                # In Odoo 18, make sure move line quantities are confirmed properly
-                for move in self:
-                    if move.state == 'done':
-                        # Log accounting information for debugging
-                        _logger.info(f"Validated move {move.id} for product {move.product_id.name}, "
-                                    f"quantity: {move.product_uom_qty}")
-                        
-                        # If this is a valued move, log additional details
-                        try:
-                            if hasattr(move, 'account_move_ids'):
-                                account_moves = move.account_move_ids
-                                if account_moves:
-                                    _logger.info(f"Move {move.id} has accounting entries: "
-                                                f"{account_moves.mapped('name')}")
-                                    for amove in account_moves:
-                                        if hasattr(amove, 'line_ids'):
-                                            for line in amove.line_ids:
-                                                _logger.info(f"Account move line: {line.name}, "
-                                                            f"account: {line.account_id.name}, "
-                                                            f"balance: {line.balance}")
-                        except Exception as e:
-                            _logger.error(f"Error accessing accounting data: {str(e)}")
-                
-                # Process each related daily report
-                for report in report_ids.filtered(lambda r: r.state == 'confirmed'):
-                    # If all stock moves for this report are done, set report to done
-                    related_moves = self.env['stock.move'].search([
-                        ('daily_report_id', '=', report.id)
-                    ])
-                    
-                    done_moves = related_moves.filtered(lambda m: m.state == 'done')
-                    
-                    # If all required moves are done
-                    if all(move.state == 'done' for move in related_moves if move.product_id.type == 'consu'):
-                        _logger.info(f"Setting daily report {report.name} to 'done' due to stock move validation")
-                        report.with_context(force_write=True).write({'state': 'done'})
-                        
-                        # Force recompute of product line costs based on validated stock moves before creating analytic entries
-                        all_product_lines = report.labor_machinery_lines + report.other_product_lines
-                        for line in all_product_lines:
-                            validated_moves = done_moves.filtered(lambda m: m.product_id.id == line.product_id.id)
-                            if validated_moves:
-                                _logger.info(f"Product {line.product_id.name} has {len(validated_moves)} validated moves")
-                        
-                        # Create analytic entries with updated costs
-                        if not report.analytic_line_ids:
-                            report._create_analytic_entries()
+        if vals.get('state') == 'done' and self.daily_report_id:
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug("Stock moves %s validated for daily reports %s", self.ids, self.daily_report_id.ids)
+            self.env['farm.report.reconciler']._defer(self)
+            self.filtered('daily_report_id').product_id._update_farm_usage()
         
         return result
 
@@ -1154,6 +1072,9 @@ class StockMove(models.Model):
 class DailyReportLine(models.Model):
     _name = 'farm.daily.report.line'
     _description = 'Daily Report Product Line'
+
+    # Fields that change the quantity consumed from purchase lines
+    _FARM_INDEX_FIELDS = {'purchase_order_line_id', 'quantity', 'report_id'}
     
     # Link to parent report
     report_id = fields.Many2one('farm.daily.report', string='Daily Report', required=True, ondelete='cascade')
@@ -1219,6 +1140,10 @@ class DailyReportLine(models.Model):
         ('not_tracked', 'Not Tracked')
     ], string='Availability', compute='_compute_available_stock')
 
+    # Vendor bill covering this line (per report or per billing period)
+    vendor_bill_id = fields.Many2one('account.move', string='Vendor Bill', readonly=True,
+                                     copy=False, index=True, ondelete='set null')
+
     # Forecast tracking
     forecasted_issue = fields.Boolean(string='Forecasted Issue', 
                                     compute='_compute_forecasted_issue', store=True)
@@ -1249,23 +1174,31 @@ class DailyReportLine(models.Model):
             line.po_fields_visible = (line.line_type == 'labor_machinery')
 
     @api.depends('product_id', 'quantity', 'purchase_order_line_id', 'purchase_order_line_id.price_unit', 'line_type', 'po_unit_price', 'report_id.stock_move_ids.state')
+    @instrumented
     def _compute_actual_cost(self):
         """Enhanced cost calculation - labor/machinery must use PO prices only"""
         # Use force_write context to avoid write restrictions during computation
         self = self.with_context(force_write=True)
         
+        # Weighted unit cost of the validated stock moves of all stock lines,
+        # read with one grouped query and valued once per transaction
+        resolver = self.env['farm.cost.resolver']
+        stock_lines = self.filtered(
+            lambda l: l.line_type != 'labor_machinery' and l.product_id.type != 'service'
+        )
+        unit_costs = resolver._get_unit_costs(resolver._get_done_moves(
+            stock_lines.report_id._origin, stock_lines.product_id))
+        
         for line in self:
             if line.line_type == 'labor_machinery':
                 if line.purchase_order_line_id:
                     # Directly get the price from PO line to ensure we have the latest value
                     po_price = line.purchase_order_line_id.price_unit
                     line.actual_cost = po_price * line.quantity
-                    _logger.info(f"DEBUG: Labor/machinery cost calculation for line {line.id}: "
-                               f"PO price: {po_price}, Quantity: {line.quantity}, Total cost: {line.actual_cost}")
                 else:
                     # This shouldn't happen due to constraints, but handle gracefully
                     line.actual_cost = 10.0
-                    _logger.warning(f"Labor/machinery line {line.id} missing PO data")
+                    _logger.warning("Labor/machinery line %s missing PO data", line.id)
                 continue
                 
             # For services in other products section, use standard pricing
@@ -1274,117 +1207,232 @@ class DailyReportLine(models.Model):
                 line.actual_cost = standard_price * line.quantity
                 continue
                 
-            # Look for validated stock moves for this product in this report
-            moves = self.env['stock.move'].search([
-                ('daily_report_id', '=', line.report_id.id),
-                ('product_id', '=', line.product_id.id),
-                ('state', '=', 'done')
-            ])
-            
-            if moves:
-                # Use the actual valuation from the stock moves
-                try:
-                    total_cost = sum(move.product_price_value_unit * move.product_qty for move in moves)
-                    total_qty = sum(move.product_qty for move in moves)
-                    # If we have quantities, calculate unit cost and multiply by line qty
-                    if total_qty > 0:
-                        unit_cost = total_cost / total_qty
-                        line.actual_cost = unit_cost * line.quantity
-                    else:
-                        standard_price = line.product_id.standard_price or 0.0
-                        line.actual_cost = standard_price * line.quantity
-                except Exception as e:
-                    _logger.warning(f"Error calculating cost from stock moves: {str(e)}")
-                    standard_price = line.product_id.standard_price or 0.0
-                    line.actual_cost = standard_price * line.quantity
+            # Use the actual valuation of the validated stock moves, or the standard price
+            unit_cost = unit_costs.get((line.report_id._origin.id, line.product_id.id))
+            if unit_cost is None:
+                unit_cost = line.product_id.standard_price or 0.0
+            line.actual_cost = unit_cost * line.quantity
+
+    def _get_stock_company_id(self):
+        """Return the id of the company whose stock this line consumes"""
+        self.ensure_one()
+        return self.report_id.company_id.id or self.env.company.id
+
+    def _get_available_quantities(self):
+        """Return on-hand quantities for the consumable products of the lines.
+
+        Lines are grouped by company and each group is resolved with a single
+        quantity computation for all of its products.
+
+        Returns:
+            dict: on-hand quantity keyed by (company_id, product_id)
+        """
+        products_by_company = defaultdict(lambda: self.env['product.product'])
+        for line in self:
+            if line.product_id and line.product_id.type == 'consu':
+                products_by_company[line._get_stock_company_id()] |= line.product_id
+
+        def compute_quantities(company_id, products):
+            quantities = products.with_company(company_id)._compute_quantities_dict(
+                self.env.context.get('lot_id'),
+                self.env.context.get('owner_id'),
+                self.env.context.get('package_id'),
+            )
+            return {product_id: qty['qty_available'] for product_id, qty in quantities.items()}
+
+        available_quantities = {}
+        for company_id, products in products_by_company.items():
+            quantities = self._get_cached_product_values(
+                'qty_available', company_id, products,
+                lambda missing, company_id=company_id: compute_quantities(company_id, missing),
+            )
+            for product_id, qty_available in quantities.items():
+                available_quantities[(company_id, product_id)] = qty_available
+        return available_quantities
+
+    @api.model
+    def _get_cached_product_values(self, kind, company_id, products, compute, extra_key=None):
+        """Return {product id: value} computed by compute(products).
+
+        Only when evaluating lines being edited (farm_line_evaluation context),
+        values are reused for a few seconds as long as the product's stamp in
+        the company is unchanged (see _get_product_stock_stamps).
+        """
+        if not self.env.context.get('farm_line_evaluation') or not products:
+            return compute(products)
+
+        stamps = self._get_product_stock_stamps(company_id, products)
+        now = time.monotonic()
+        values = {}
+        missing = self.env['product.product']
+        for product in products:
+            entry = _LINE_EVALUATION_CACHE.get((self.env.cr.dbname, kind, company_id, product.id, extra_key))
+            if entry and now - entry[0] < _LINE_EVALUATION_TTL and entry[1] == stamps[product.id]:
+                values[product.id] = entry[2]
             else:
-                # Fallback to standard price if no validated moves exist
-                standard_price = line.product_id.standard_price or 0.0
-                line.actual_cost = standard_price * line.quantity
+                missing |= product
+
+        if missing:
+            for product_id, value in compute(missing).items():
+                key = (self.env.cr.dbname, kind, company_id, product_id, extra_key)
+                _LINE_EVALUATION_CACHE[key] = (now, stamps[product_id], value)
+                values[product_id] = value
+        return values
+
+    @api.model
+    def _get_product_stock_stamps(self, company_id, products):
+        """Return {product id: stamp} of the documents the stock figures of products are computed from.
+
+        A stamp holds the latest write date and the count of the product's
+        quants, stock moves and daily report lines in the company, so that
+        new, changed or deleted documents invalidate the cached figures.
+        """
+        stamps = {product.id: () for product in products}
+        for model, company_field in (
+            ('stock.quant', 'company_id'),
+            ('stock.move', 'company_id'),
+            ('farm.daily.report.line', 'report_id.company_id'),
+        ):
+            groups = {
+                product.id: (write_date, count)
+                for product, write_date, count in self.env[model].sudo()._read_group(
+                    [('product_id', 'in', products.ids), (company_field, 'in', [company_id, False])],
+                    groupby=['product_id'],
+                    aggregates=['write_date:max', '__count'],
+                )
+            }
+            for product_id in stamps:
+                stamps[product_id] += groups.get(product_id, (False, 0))
+        return stamps
+
+    @api.model
+    def evaluate_lines(self, lines_data):
+        """Evaluate the lines of a report form in a single call.
+
+        Args:
+            lines_data: list of dicts with the edited values of each line:
+                product_id, quantity, line_type, purchase_order_id, and either
+                report_id or project_id/date for unsaved reports. id is the
+                line being edited, if it is already saved.
+
+        Returns:
+            list: one dict per line, in the same order, with available_stock,
+            product_availability, forecasted_issue and actual_cost
+        """
+        Report = self.env['farm.daily.report']
+        new_reports = {}
+        lines = self.browse()
+        for data in lines_data:
+            if data.get('report_id'):
+                report = Report.browse(data['report_id'])
+            else:
+                # Lines of the same unsaved report share one in-memory report
+                report_key = (data.get('project_id'), data.get('date'))
+                if report_key not in new_reports:
+                    new_reports[report_key] = Report.new({
+                        'project_id': data.get('project_id'),
+                        'date': data.get('date') or fields.Date.context_today(self),
+                        'state': 'draft',
+                    })
+                report = new_reports[report_key]
+            lines |= self.new({
+                'report_id': report,
+                'product_id': data.get('product_id'),
+                'quantity': data.get('quantity') or 0.0,
+                'line_type': data.get('line_type') or 'other',
+                'purchase_order_id': data.get('purchase_order_id'),
+            }, origin=self.browse(data['id']) if data.get('id') else None)
+        return lines._evaluate()
+
+    def _evaluate(self):
+        """Compute availability, forecast and cost of the lines, reusing cached stock figures"""
+        lines = self.with_context(farm_line_evaluation=True, force_write=True)
+        lines._compute_available_stock()
+        lines._compute_forecasted_issue()
+        lines._compute_actual_cost()
+        return [{
+            'available_stock': line.available_stock,
+            'product_availability': line.product_availability,
+            'forecasted_issue': line.forecasted_issue,
+            'actual_cost': line.actual_cost,
+        } for line in lines]
 
     @api.depends('product_id', 'quantity', 'report_id.company_id')
+    @instrumented
     def _compute_available_stock(self):
-        """Compute available stock for the product with accurate on-hand quantities"""
+        """Compute available stock for the product with accurate on-hand quantities.
+
+        Quantities are computed once per company for all products of the lines
+        and shared by the lines consuming the same product.
+        """
+        available_quantities = self._get_available_quantities()
         for line in self:
-            # For services or non-tracked products, set appropriate values
-            if not line.product_id or line.product_id.type == 'service':
+            # Only consumable products are tracked; services and others are not
+            if not line.product_id or line.product_id.type != 'consu':
                 line.available_stock = 0.0
                 line.product_availability = 'not_tracked'
                 continue
-                
-            # For stockable and consumable products, compute real available stock
-            if line.product_id.type == 'consu':
-                try:
-                    # Get the company context for accurate stock calculation
-                    company_id = line.report_id.company_id.id or self.env.company.id
-                    
-                    # Use Odoo's standard method with company context
-                    available_qty = line.product_id.with_company(company_id).qty_available
-                    
-                    # Store the result
-                    line.available_stock = available_qty
-                    
-                except Exception as e:
-                    _logger.error(f"Error calculating available stock: {str(e)}")
-                    # Fallback to standard qty_available in case of error
-                    line.available_stock = line.product_id.with_company(company_id).qty_available
-                
-                # Set availability status based on available quantity
-                if line.available_stock <= 0:
-                    line.product_availability = 'no_stock'
-                elif line.available_stock < line.quantity:
-                    line.product_availability = 'low_stock'
-                else:
-                    line.product_availability = 'available'
+
+            line.available_stock = available_quantities.get(
+                (line._get_stock_company_id(), line.product_id.id), 0.0)
+
+            # Set availability status based on available quantity
+            if line.available_stock <= 0:
+                line.product_availability = 'no_stock'
+            elif line.available_stock < line.quantity:
+                line.product_availability = 'low_stock'
             else:
-                # For any other product types
-                line.available_stock = 0.0
-                line.product_availability = 'not_tracked'
+                line.product_availability = 'available'
 
-    @api.depends('product_id', 'quantity', 'report_id.date')
+    @api.depends('product_id', 'quantity', 'report_id.date', 'report_id.state')
+    @instrumented
     def _compute_forecasted_issue(self):
-        """Compute if there's a forecasted stock issue for the product"""
-        for line in self:
-            line.forecasted_issue = False
-            if line.product_id and line.product_id.type == 'consu':
-                try:
-                    # Get company context for accurate forecast calculation
-                    company_id = self.env.company.id
-                    if line.report_id and line.report_id.company_id:
-                        company_id = line.report_id.company_id.id
-                    
-                    # Calculate forecasted availability considering the report date
-                    to_date = fields.Date.today()  # Default to today
-                    if line.report_id and line.report_id.date:
-                        to_date = line.report_id.date
-                    
-                    virtual_available = line.product_id.with_context(
-                        company_id=company_id, 
-                        to_date=to_date
-                    ).virtual_available
-                    
-                    # Check if forecasted quantity will be negative after this consumption
-                    quantity = line.quantity or 0.0
-                    if virtual_available - quantity < 0:
-                        line.forecasted_issue = True
-                        
-                except Exception as e:
-                    _logger.warning(f"Error calculating forecasted issue for product {line.product_id.name}: {str(e)}")
-                    line.forecasted_issue = False
+        """Compute if there's a forecasted stock issue for the product.
+
+        One projected stock curve is built per company and product, including
+        the consumption of other pending reports, and every line checks whether
+        its consumption makes the curve negative on the report date.
+        """
+        forecast = self.env['farm.stock.forecast']
+        self.forecasted_issue = False
+        stock_lines = self.filtered(lambda l: l.product_id.type == 'consu')
+
+        lines_by_company = defaultdict(lambda: self.env['farm.daily.report.line'])
+        for line in stock_lines:
+            lines_by_company[line._get_stock_company_id()] |= line
+
+        today = fields.Date.today()
+        for company_id, lines in lines_by_company.items():
+            # The lines being computed are projected from their current values below
+            curves = self._get_cached_product_values(
+                'forecast_curve', company_id, lines.product_id,
+                lambda products, lines=lines, company_id=company_id: forecast._build_curves(
+                    company_id, products, exclude_lines=lines._origin),
+                extra_key=tuple(sorted(lines._origin.ids)),
+            )
+
+            # Pending lines of the batch also consume stock for each other
+            pending = defaultdict(list)
+            for line in lines:
+                if line.report_id.state in ('draft', 'confirming'):
+                    pending[line.product_id.id].append((line.report_id.date or today, line))
+
+            for line in lines:
+                line_date = line.report_id.date or today
+                projected = forecast._get_projected_quantity(curves[line.product_id.id], line_date)
+                projected -= sum(
+                    other.quantity for day, other in pending[line.product_id.id]
+                    if day <= line_date and other != line
+                )
+                # Check if forecasted quantity will be negative after this consumption
+                line.forecasted_issue = projected - (line.quantity or 0.0) < 0
 
     @api.onchange('product_id', 'quantity')
     def _onchange_quantity(self):
         """Update forecast when quantity or product changes"""
         if self.product_id:
-            # Force recompute of forecasted issue for immediate UI feedback
-            self._compute_forecasted_issue()
-            
-            # Also recompute available stock
-            self._compute_available_stock()
-            
-            # If we have quantity, also recompute actual cost
-            if self.quantity:
-                self.with_context(force_write=True)._compute_actual_cost()
+            # Availability, forecast and cost for immediate UI feedback, in one evaluation
+            self._evaluate()
     
     @api.model
     def _get_editable_fields_in_confirmed_state(self):
@@ -1393,25 +1441,44 @@ class DailyReportLine(models.Model):
         # Also include fields that get updated during stock validation process
         return [
             'notes', 'observation', 'issues', 'actual_cost', 'available_stock', 
-            'product_availability', 'uom_id', 'forecasted_issue'
+            'product_availability', 'uom_id', 'forecasted_issue', 'vendor_bill_id'
         ]
     
     def write(self, vals):
-        """Restrict field updates after the report is confirmed
-        Only allow notes and observations to be modified after confirmation,
+        """Restrict field updates after the report is confirmed and refresh the
+        remaining quantities of the purchase lines whose consumption changed"""
+        self._check_write_allowed(vals)
+        po_lines = self.purchase_order_line_id if self._FARM_INDEX_FIELDS.intersection(vals) else None
+        result = super().write(vals)
+        if po_lines is not None:
+            po_lines |= self.purchase_order_line_id
+            if po_lines:
+                self.env['farm.service.po.line']._refresh(po_lines)
+        return result
+
+    def unlink(self):
+        """Give the quantities consumed by deleted lines back to their purchase lines"""
+        po_lines = self.purchase_order_line_id
+        result = super().unlink()
+        if po_lines:
+            self.env['farm.service.po.line']._refresh(po_lines)
+        return result
+
+    def _check_write_allowed(self, vals):
+        """Only allow notes and observations to be modified after confirmation,
         but always allow stock validation, state changes, and force_write contexts"""
         
         # Always allow updates with force_write context (used in confirmation)
         if self.env.context.get('force_write', False):
-            return super().write(vals)
+            return
         
         # Always allow updates during record creation/import
         if self.env.context.get('install_mode', False) or self.env.context.get('import_file', False):
-            return super().write(vals)
+            return
         
         # Allow updates from onchange methods (they should not be restricted)
         if self.env.context.get('onchange', False):
-            return super().write(vals)
+            return
         
         # Special handling for stock validation and state changes
         state_change = 'state' in vals
@@ -1420,12 +1487,12 @@ class DailyReportLine(models.Model):
         
         # Always allow state changes and cost updates from validation
         if (state_change or cost_update) and stock_validation:
-            return super().write(vals)
+            return
             
         # No restrictions in draft state
         records_not_in_draft = self.filtered(lambda r: r.report_id and r.report_id.state != 'draft')
         if not records_not_in_draft:
-            return super().write(vals)
+            return
             
         # For records not in draft, only allow specific fields to be updated
         editable_fields = self._get_editable_fields_in_confirmed_state()
@@ -1438,13 +1505,12 @@ class DailyReportLine(models.Model):
                 "You cannot modify the following fields after report confirmation: %s. "
                 "Only notes, issues, and observations can be updated after stock movements have been created."
             ) % ", ".join(restricted_names))
-        
-        return super().write(vals)
 
     def _get_state_label(self):
         """Get translated label for state at runtime"""
         state_labels = {
             'draft': _('Draft'),
+            'confirming': _('Confirming'),
             'confirmed': _('Confirmed'),
             'done': _('Done'),
         }
@@ -1516,6 +1582,7 @@ class DailyReportLine(models.Model):
         """Return states properly translated at runtime"""
         return [
             ('draft', _('Draft')),
+            ('confirming', _('Confirming')),
             ('confirmed', _('Confirmed')),
             ('done', _('Done'))
         ]
@@ -1590,19 +1657,15 @@ class DailyReportLine(models.Model):
                 line.po_unit_price = 0.0
 
     @api.depends('product_id')
+    @instrumented
     def _compute_available_po_lines(self):
         """Compute available Purchase Orders for selected product, excluding locked POs"""
+        # Open purchase orders of all products, read from the purchase line index
+        labor_lines = self.filtered(lambda l: l.product_id and l.line_type == 'labor_machinery')
+        orders_by_product = self.env['farm.service.po.line']._get_orders_by_product(labor_lines.product_id)
         for line in self:
-            if line.product_id and line.line_type == 'labor_machinery':
-                # Domain to get available POs that contain this product
-                domain = [
-                    ('order_line.product_id', '=', line.product_id.id),
-                    ('state', 'in', ['purchase', 'to approve']),
-                    ('partner_id.supplier_rank', '>', 0),
-                    ('order_line.product_id.categ_id.name', 'in', ['Labor Services', 'Machinery'])
-                ]
-                
-                available_pos = self.env['purchase.order'].search(domain)
+            if line in labor_lines:
+                available_pos = orders_by_product.get(line.product_id.id, self.env['purchase.order'])
                 line.available_po_lines = [(6, 0, available_pos.ids)]
             else:
                 line.available_po_lines = [(5, 0, 0)]
@@ -1626,10 +1689,10 @@ class DailyReportLine(models.Model):
     @api.depends('line_type')
     def _compute_available_products(self):
         """Compute available products based on line type"""
+        # Products with available PO lines, shared by all labor/machinery lines
+        product_ids = self._get_products_with_po_lines() if 'labor_machinery' in self.mapped('line_type') else []
         for line in self:
             if line.line_type == 'labor_machinery':
-                # Get products with available PO lines
-                product_ids = self._get_products_with_po_lines()
                 line.available_product_ids = [(6, 0, product_ids)]
             else:
                 line.available_product_ids = [(5, 0, 0)]  # Clear the field
@@ -1637,22 +1700,7 @@ class DailyReportLine(models.Model):
     @api.model
     def _get_products_with_po_lines(self):
         """Get products that have available Purchase Orders in Labor Services or Machinery categories"""
-        # Base domain for Purchase Orders
-        domain = [
-            ('state', 'in', ['purchase', 'to approve']),
-            ('partner_id.supplier_rank', '>', 0),
-            ('order_line.product_id.categ_id.name', 'in', ['Labor Services', 'Machinery'])
-        ]
-        
-        # Get all POs matching criteria
-        pos = self.env['purchase.order'].search(domain)
-        
-        # Extract unique product IDs from PO lines
-        product_ids = pos.mapped('order_line.product_id').filtered(
-            lambda p: p.categ_id.name in ['Labor Services', 'Machinery']
-        ).ids
-        
-        return product_ids
+        return self.env['farm.service.po.line']._get_available_products().ids
     
     @api.model
     def _get_labor_machinery_product_domain(self):
@@ -1661,7 +1709,7 @@ class DailyReportLine(models.Model):
         
         return [
             ('id', 'in', product_ids),
-            ('categ_id.name', 'in', ['Labor Services', 'Machinery'])
+            ('farm_line_type', '=', 'labor_machinery')
         ]
 
     @api.onchange('product_id')
@@ -1738,7 +1786,7 @@ class DailyReportLine(models.Model):
                     raise ValidationError(_('Cannot use cancelled purchase orders.'))
                 
                 # Validate product category
-                if line.product_id.categ_id.name not in ['Labor Services', 'Machinery']:
+                if line.product_id.farm_line_type != 'labor_machinery':
                     raise ValidationError(_('Product must be in Labor Services or Machinery category.'))
 
     @api.model
@@ -40,6 +40,10 @@ class Farm(models.Model):
     # Stock location for inventory operations
     location_id = fields.Many2one('stock.location', string='Stock Location',
                                help="Location where farm supplies and products are stored")
+    # Production location receiving the inputs consumed by the farm's operations
+    consumption_location_id = fields.Many2one('stock.location', string='Consumption Location',
+                                              readonly=True, copy=False, ondelete='restrict',
+                                              help="Parent location of the farm's field and project locations")
     # TODO:-> Delete these field if not needed
     property_value = fields.Monetary(string='Property Value', currency_field='currency_id', tracking=True)
     
@@ -128,6 +132,50 @@ class Farm(models.Model):
         
         return records
     
+    def write(self, vals):
+        """Keep the consumption location name in sync"""
+        result = super().write(vals)
+        if 'name' in vals:
+            for farm in self.filtered('consumption_location_id'):
+                farm.consumption_location_id.write({'name': f"Farm: {farm.name}"})
+        return result
+
+    def _get_consumption_location(self):
+        """Return the farm's consumption location, creating and linking it on first use"""
+        self.ensure_one()
+        if self.consumption_location_id:
+            return self.consumption_location_id
+
+        # Get the Physical Locations parent
+        physical_locations = self.env.ref('stock.stock_location_locations', raise_if_not_found=False)
+        if not physical_locations:
+            physical_locations = self.env['stock.location'].search([
+                ('name', '=', 'Physical Locations'),
+                ('usage', '=', 'view')
+            ], limit=1)
+
+        if not physical_locations:
+            raise ValidationError(_("No Physical Locations found to create farm location hierarchy."))
+
+        # Adopt a location created before locations were linked to farms
+        location = self.env['stock.location'].search([
+            ('name', '=', f"Farm: {self.name}"),
+            ('location_id', '=', physical_locations.id),
+            ('usage', '=', 'production'),
+            ('company_id', '=', self.company_id.id)
+        ], limit=1)
+
+        if not location:
+            location = self.env['stock.location'].create({
+                'name': f"Farm: {self.name}",
+                'usage': 'production',  # Using production type for farm operations
+                'location_id': physical_locations.id,
+                'company_id': self.company_id.id,
+            })
+
+        self.sudo().consumption_location_id = location.id
+        return location
+
     def _compute_field_count(self):
         """Compute the number of fields in the farm"""
         for farm in self:
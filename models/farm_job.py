@@ -0,0 +1,136 @@
+from odoo import fields, models, api, _
+from .farm_perf_sample import instrumented
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class FarmJob(models.Model):
+    _name = 'farm.job'
+    _description = 'Farm Background Job'
+    _order = 'id desc'
+
+    name = fields.Char(string='Description', required=True, readonly=True)
+    job_type = fields.Selection([
+        ('confirm_report', 'Confirm Daily Report'),
+    ], string='Job Type', required=True, readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, index=True, readonly=True)
+
+    # Record processed by the job
+    report_id = fields.Many2one('farm.daily.report', string='Daily Report',
+                                index=True, ondelete='cascade', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company',
+                                 default=lambda self: self.env.company, readonly=True)
+    user_id = fields.Many2one('res.users', string='Requested By',
+                              default=lambda self: self.env.user, readonly=True)
+
+    # Execution tracking
+    attempts = fields.Integer(string='Attempts', default=0, readonly=True)
+    max_attempts = fields.Integer(string='Max Attempts', readonly=True,
+                                  default=lambda self: self._get_default_max_attempts())
+    date_started = fields.Datetime(string='Last Run', readonly=True)
+    date_done = fields.Datetime(string='Done On', readonly=True)
+    error_message = fields.Text(string='Last Error', readonly=True)
+
+    @api.model
+    def _get_default_max_attempts(self):
+        """Return the configured number of attempts before a job is marked as failed"""
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'farm_management.job_max_attempts', 3))
+
+    @api.model
+    def _get_batch_size(self):
+        """Return the configured number of jobs processed per cron run"""
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'farm_management.job_batch_size', 20)) or 20
+
+    @api.model
+    def _enqueue(self, vals_list):
+        """Create pending jobs and wake up the job runner"""
+        jobs = self.sudo().create(vals_list)
+        self._trigger_runner()
+        return jobs
+
+    @api.model
+    def _trigger_runner(self):
+        """Ask the job runner cron to run as soon as possible"""
+        cron = self.env.ref('farm_management.ir_cron_farm_job_runner', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    def action_retry(self):
+        """Put failed jobs back in the queue"""
+        failed_jobs = self.filtered(lambda j: j.state == 'failed')
+        for job in failed_jobs:
+            if job.job_type == 'confirm_report' and job.report_id.state == 'draft':
+                job.report_id.with_context(force_write=True).write({'state': 'confirming'})
+        failed_jobs.write({'state': 'pending', 'attempts': 0, 'error_message': False})
+        self._trigger_runner()
+        return True
+
+    @api.model
+    @instrumented
+    def _cron_run_jobs(self):
+        """Run a batch of pending jobs.
+
+        Jobs are claimed with FOR UPDATE SKIP LOCKED so several cron workers can
+        drain the queue concurrently. Each job runs in its own savepoint: a
+        failing job is retried on the next run until it reaches its maximum
+        number of attempts.
+        """
+        batch_size = self._get_batch_size()
+        self.env.cr.execute("""
+            SELECT id FROM farm_job
+             WHERE state = 'pending'
+             ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [batch_size])
+        jobs = self.browse([row[0] for row in self.env.cr.fetchall()])
+
+        for job in jobs:
+            job.write({'attempts': job.attempts + 1, 'date_started': fields.Datetime.now()})
+            try:
+                with self.env.cr.savepoint():
+                    job._run()
+            except Exception as e:
+                _logger.warning("Farm job %s failed (attempt %s/%s): %s",
+                                job.id, job.attempts, job.max_attempts, e)
+                job.error_message = str(e)
+                if job.attempts >= job.max_attempts:
+                    job.state = 'failed'
+                    job._on_failure()
+            else:
+                job.write({'state': 'done', 'date_done': fields.Datetime.now(), 'error_message': False})
+
+        # Jobs that failed in this run wait for the next scheduled run
+        remaining = self.search_count([('state', '=', 'pending'), ('id', 'not in', jobs.ids)])
+        self.env['ir.cron']._notify_progress(done=len(jobs), remaining=remaining)
+
+    def _run(self):
+        """Execute the job"""
+        self.ensure_one()
+        if self.job_type == 'confirm_report':
+            report = self.report_id.with_user(self.user_id).with_company(self.company_id)
+            if report.state != 'confirming':
+                return
+            # Confirmation expects a draft report; rolled back with the savepoint on failure
+            report.with_context(force_write=True).write({'state': 'draft'})
+            report.with_context(farm_job_run=True).action_confirm()
+
+    def _on_failure(self):
+        """Give the record back to the user once the job has definitely failed"""
+        self.ensure_one()
+        if self.job_type == 'confirm_report' and self.report_id.state == 'confirming':
+            self.report_id.with_context(force_write=True).write({'state': 'draft'})
+            self.report_id.message_post(
+                body=_("Background confirmation failed after %(attempts)s attempt(s): %(error)s") % {
+                    'attempts': self.attempts,
+                    'error': self.error_message,
+                },
+                message_type='notification'
+            )
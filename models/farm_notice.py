@@ -0,0 +1,102 @@
+from odoo import fields, models, api, _
+from markupsafe import Markup
+from .farm_perf_sample import instrumented
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Pre-commit data key marking that the digest cron is already triggered
+_TRIGGER_KEY = 'farm_management.harvest_notice_trigger'
+
+
+class FarmHarvestNotice(models.Model):
+    """Queue of harvest stock notes waiting to be sent as a digest.
+
+    In digest mode, harvest receipt creation and validation, stock
+    verifications and inventory fallbacks add rows here instead of posting on
+    the project and scheduling activities. The digest cron turns the queued
+    rows into one activity per responsible user.
+    """
+    _name = 'farm.harvest.notice'
+    _description = 'Farm Harvest Notice'
+    _order = 'id'
+
+    project_id = fields.Many2one('farm.cultivation.project', string='Project',
+                                 required=True, ondelete='cascade', readonly=True)
+    user_id = fields.Many2one('res.users', string='Responsible', required=True, index=True, readonly=True)
+    notice_type = fields.Selection([
+        ('receipt', 'Harvest Receipt Created'),
+        ('skipped', 'Harvest Receipt Not Created'),
+        ('validation', 'Harvest Receipt Validated'),
+        ('verification', 'Verify Harvest Stock Receipt'),
+        ('adjusted', 'Inventory Adjusted'),
+        ('adjustment', 'Manual Inventory Adjustment Needed'),
+    ], string='Type', required=True, readonly=True)
+    note = fields.Text(string='Note', required=True, readonly=True)
+
+    @api.model
+    def _is_digest_enabled(self):
+        """Return whether harvest notes are collected into digests"""
+        return bool(self.env['ir.config_parameter'].sudo().get_param('farm_management.harvest_notice_digest'))
+
+    @api.model
+    def _enqueue(self, notes):
+        """Queue notes for the digests of the projects' responsible users.
+
+        Args:
+            notes: list of (project, notice type, note) tuples, created in one batch
+        """
+        if not notes:
+            return self.browse()
+        admin = self.env.ref('base.user_admin')
+        notices = self.sudo().create([{
+            'project_id': project.id,
+            'user_id': (project.sudo().farm_id.manager_id or admin).id,
+            'notice_type': notice_type,
+            'note': note,
+        } for project, notice_type, note in notes])
+        self._trigger_digest()
+        return notices
+
+    @api.model
+    def _trigger_digest(self):
+        """Wake up the digest cron once for the whole transaction"""
+        precommit = self.env.cr.precommit
+        if precommit.data.get(_TRIGGER_KEY):
+            return
+        cron = self.env.ref('farm_management.ir_cron_farm_harvest_notice_digest', raise_if_not_found=False)
+        if cron:
+            precommit.data[_TRIGGER_KEY] = True
+            precommit.add(cron.sudo()._trigger)
+
+    @api.model
+    @instrumented
+    def _cron_send_digests(self):
+        """Schedule one activity per responsible user for all queued notes"""
+        notices = self.sudo().search([])
+        if not notices:
+            return
+        res_model_id = self.env['ir.model']._get_id('farm.cultivation.project')
+        activity_type = self.env.ref('mail.mail_activity_data_todo')
+        type_labels = dict(self._fields['notice_type']._description_selection(self.env))
+
+        activity_vals_list = []
+        for user, user_notices in notices.grouped('user_id').items():
+            items = Markup().join(
+                Markup("<li><strong>%s</strong> (%s): %s</li>") % (
+                    notice.project_id.display_name, type_labels[notice.notice_type], notice.note)
+                for notice in user_notices
+            )
+            activity_vals_list.append({
+                'res_model_id': res_model_id,
+                # Activities need a document; attach the digest to its first project
+                'res_id': user_notices[0].project_id.id,
+                'user_id': user.id,
+                'summary': _('Harvest stock digest: %d note(s)', len(user_notices)),
+                'note': Markup("<ul>%s</ul>") % items,
+                'activity_type_id': activity_type.id,
+                'date_deadline': fields.Date.today(),
+            })
+        self.env['mail.activity'].sudo().with_context(mail_activity_quick_update=True).create(activity_vals_list)
+        _logger.info("Sent %s harvest notes in %s digests", len(notices), len(activity_vals_list))
+        notices.unlink()
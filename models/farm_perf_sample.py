@@ -0,0 +1,116 @@
+from odoo import fields, models, api, SUPERUSER_ID
+from datetime import timedelta
+import functools
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Cursor cache key of the samples collected by the current transaction
+_BUFFER_KEY = 'farm_perf_sample_buffer'
+
+
+def instrumented(method):
+    """Record wall time, SQL queries and record count of a model method.
+
+    Does nothing unless farm performance instrumentation is enabled for the
+    database. Samples are aggregated per method for the whole transaction and
+    written in a separate cursor once it ends, so they also survive rollbacks.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.env['farm.perf.sample']._is_enabled():
+            return method(self, *args, **kwargs)
+        cr = self.env.cr
+        query_count = getattr(cr, 'sql_log_count', 0)
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.env['farm.perf.sample']._record(
+                self._name, method.__name__,
+                duration=time.perf_counter() - start,
+                query_count=getattr(cr, 'sql_log_count', 0) - query_count,
+                record_count=len(self),
+            )
+    return wrapper
+
+
+class FarmPerfSample(models.Model):
+    _name = 'farm.perf.sample'
+    _description = 'Farm Performance Sample'
+    _order = 'date desc, id desc'
+
+    name = fields.Char(string='Method', required=True, index=True, readonly=True)
+    model_name = fields.Char(string='Model', readonly=True)
+    method_name = fields.Char(string='Method Name', readonly=True)
+    date = fields.Datetime(string='Date', default=fields.Datetime.now, required=True, index=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+
+    # Measures, summed over the calls of one transaction
+    call_count = fields.Integer(string='Calls', readonly=True)
+    duration_ms = fields.Float(string='Duration (ms)', digits=(16, 1), readonly=True)
+    query_count = fields.Integer(string='SQL Queries', readonly=True)
+    record_count = fields.Integer(string='Records', readonly=True)
+    avg_duration_ms = fields.Float(string='Avg Duration per Call (ms)', digits=(16, 1),
+                                   aggregator='avg', readonly=True)
+
+    @api.model
+    def _is_enabled(self):
+        """Return whether instrumentation is switched on for this database"""
+        return bool(self.env['ir.config_parameter'].sudo().get_param('farm_management.perf_instrumentation'))
+
+    @api.model
+    def _record(self, model_name, method_name, duration, query_count, record_count):
+        """Add one call to the samples of the current transaction"""
+        cr = self.env.cr
+        buffer = cr.cache.get(_BUFFER_KEY)
+        if buffer is None:
+            buffer = cr.cache[_BUFFER_KEY] = {}
+            flush = functools.partial(self._flush_buffer, cr, self.env.registry)
+            cr.postcommit.add(flush)
+            cr.postrollback.add(flush)
+
+        key = (model_name, method_name)
+        sample = buffer.get(key)
+        if sample is None:
+            sample = buffer[key] = {
+                'name': f"{model_name}.{method_name}",
+                'model_name': model_name,
+                'method_name': method_name,
+                'user_id': self.env.uid,
+                'company_id': self.env.company.id,
+                'call_count': 0,
+                'duration_ms': 0.0,
+                'query_count': 0,
+                'record_count': 0,
+            }
+        sample['call_count'] += 1
+        sample['duration_ms'] += duration * 1000.0
+        sample['query_count'] += query_count
+        sample['record_count'] += record_count
+
+    @api.model
+    def _flush_buffer(self, cr, registry):
+        """Write the samples of a finished transaction in a separate cursor"""
+        buffer = cr.cache.pop(_BUFFER_KEY, None)
+        if not buffer:
+            return
+        vals_list = list(buffer.values())
+        for vals in vals_list:
+            vals['avg_duration_ms'] = vals['duration_ms'] / vals['call_count']
+        try:
+            with registry.cursor() as sample_cr:
+                env = api.Environment(sample_cr, SUPERUSER_ID, {})
+                env['farm.perf.sample'].create(vals_list)
+        except Exception:
+            # Instrumentation must never break the instrumented operation
+            _logger.warning("Could not store farm performance samples", exc_info=True)
+
+    @api.autovacuum
+    def _gc_samples(self):
+        """Drop samples older than the configured retention"""
+        days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'farm_management.perf_sample_retention_days', 30))
+        self.search([('date', '<', fields.Datetime.now() - timedelta(days=days))]).unlink()
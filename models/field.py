@@ -69,6 +69,11 @@ class Field(models.Model):
     company_id = fields.Many2one('res.company', related='farm_id.company_id', 
                                 string='Company', store=True, readonly=True)
     
+    # Production location receiving the inputs consumed on this field
+    location_id = fields.Many2one('stock.location', string='Stock Location',
+                                  readonly=True, copy=False, ondelete='restrict',
+                                  help="Field location under the farm consumption location")
+    
     _sql_constraints = [
         ('farm_code_unique', 'UNIQUE(farm_id, code)', 'Field code must be unique per farm!'),
     ]
@@ -142,6 +147,8 @@ class Field(models.Model):
         
         # If name is changed, update associated customer location name
         if 'name' in vals:
+            for field in self.filtered('location_id'):
+                field.location_id.write({'name': f"Field: {field.name}"})
             for field in self:
                 # Find the farm's customer location
                 customer_location = self.env.ref('stock.stock_location_customers', raise_if_not_found=False)
@@ -169,6 +176,32 @@ class Field(models.Model):
         
         return result
     
+    def _get_stock_location(self):
+        """Return the field's production location, creating and linking it on first use"""
+        self.ensure_one()
+        if self.location_id:
+            return self.location_id
+
+        farm_location = self.farm_id._get_consumption_location()
+
+        # Adopt a location created before locations were linked to fields
+        location = self.env['stock.location'].search([
+            ('name', '=', f"Field: {self.name}"),
+            ('location_id', '=', farm_location.id),
+            ('company_id', '=', self.company_id.id)
+        ], limit=1)
+
+        if not location:
+            location = self.env['stock.location'].create({
+                'name': f"Field: {self.name}",
+                'usage': 'production',  # Using production type for field operations
+                'location_id': farm_location.id,
+                'company_id': self.company_id.id,
+            })
+
+        self.sudo().location_id = location.id
+        return location
+    
     @api.model_create_multi
     def create(self, vals_list):
         """Generate a unique code for new fields using the sequence"""
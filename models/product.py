@@ -0,0 +1,118 @@
+from odoo import fields, models, api, _
+
+# Farm classifications of product categories
+FARM_COST_TYPES = [
+    ('agricultural', 'Agricultural Produce'),
+    ('seeds', 'Seeds/Seedlings'),
+    ('fertilizer', 'Fertilizers'),
+    ('pesticide', 'Pesticides'),
+    ('herbicide', 'Herbicides'),
+    ('water', 'Irrigation Water'),
+    ('labor', 'Labor/Workforce'),
+    ('machinery', 'Machinery/Equipment'),
+    ('other', 'Other Farm Inputs'),
+]
+
+class ProductCategory(models.Model):
+    _inherit = 'product.category'
+
+    # Farm categories shipped with the module and their classification
+    _FARM_CATEGORY_COST_TYPES = {
+        'product_category_agricultural': 'agricultural',
+        'product_category_seed': 'seeds',
+        'product_category_fertilizer': 'fertilizer',
+        'product_category_pesticide': 'pesticide',
+        'product_category_herbicide': 'herbicide',
+        'product_category_water': 'water',
+        'product_category_labor': 'labor',
+        'product_category_machinery': 'machinery',
+        'product_category_other': 'other',
+    }
+
+    farm_cost_type_manual = fields.Selection(
+        FARM_COST_TYPES, string='Farm Cost Type Override',
+        help='Farm classification set on this category; leave empty to inherit the parent category\'s')
+    farm_cost_type = fields.Selection(
+        FARM_COST_TYPES, string='Farm Cost Type', compute='_compute_farm_cost_type', store=True,
+        recursive=True, index=True,
+        help='Farm classification of the products of this category: the override of the category, '
+             'otherwise the classification of the parent category')
+    farm_line_type = fields.Selection([
+        ('labor_machinery', 'Labor & Machinery'),
+        ('other', 'Other Products'),
+    ], string='Farm Line Type', compute='_compute_farm_line_type', store=True, index=True,
+        help='Daily report section the products of this category are recorded in')
+
+    @api.depends('farm_cost_type_manual', 'parent_id.farm_cost_type')
+    def _compute_farm_cost_type(self):
+        """Classify the farm categories from their XML ids; other categories use
+        their override and otherwise take their parent's classification"""
+        category_cost_types = self._get_farm_category_cost_types()
+        for category in self:
+            category.farm_cost_type = (
+                category_cost_types.get(category._origin.id)
+                or category.farm_cost_type_manual
+                or category.parent_id.farm_cost_type
+            )
+
+    @api.depends('farm_cost_type')
+    def _compute_farm_line_type(self):
+        """Labor and machinery products are billed through purchase orders"""
+        for category in self:
+            if category.farm_cost_type in ('labor', 'machinery'):
+                category.farm_line_type = 'labor_machinery'
+            elif category.farm_cost_type:
+                category.farm_line_type = 'other'
+            else:
+                category.farm_line_type = False
+
+    @api.model
+    def _get_farm_category_cost_types(self):
+        """Return {category id: cost type} of the farm categories shipped with the module"""
+        ir_model_data = self.env['ir.model.data']
+        category_cost_types = {}
+        for xml_id, cost_type in self._FARM_CATEGORY_COST_TYPES.items():
+            category_id = ir_model_data._xmlid_to_res_id(f'farm_management.{xml_id}', raise_if_not_found=False)
+            if category_id:
+                category_cost_types[category_id] = cost_type
+        return category_cost_types
+
+    @api.model
+    def _init_farm_classification(self):
+        """Classify the farm categories once their XML ids exist; subcategories follow.
+
+        Classifications stored before overrides existed and that differ from
+        the parent's are kept as the override of their category.
+        """
+        category_cost_types = self._get_farm_category_cost_types()
+        for category in self.search([('farm_cost_type', '!=', False), ('farm_cost_type_manual', '=', False)]):
+            if (category.id not in category_cost_types
+                    and category.farm_cost_type != category.parent_id.farm_cost_type):
+                category.farm_cost_type_manual = category.farm_cost_type
+        if category_cost_types:
+            self.env.add_to_compute(
+                self._fields['farm_cost_type'],
+                self.search([('id', 'child_of', list(category_cost_types))]),
+            )
+            self.flush_model(['farm_cost_type'])
+
+    def write(self, vals):
+        """Re-index the purchase lines of products whose classification changed"""
+        result = super().write(vals)
+        if 'farm_cost_type_manual' in vals or 'parent_id' in vals:
+            self.env['farm.service.po.line']._refresh_open_lines([('product_id.categ_id', 'child_of', self.ids)])
+        return result
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    farm_cost_type = fields.Selection(related='categ_id.farm_cost_type', store=True, index=True)
+    farm_line_type = fields.Selection(related='categ_id.farm_line_type', store=True, index=True)
+
+    def write(self, vals):
+        """Re-index the purchase lines of products moved to another category"""
+        result = super().write(vals)
+        if 'categ_id' in vals:
+            self.env['farm.service.po.line']._refresh_open_lines([('product_id.product_tmpl_id', 'in', self.ids)])
+        return result
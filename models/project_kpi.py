@@ -0,0 +1,207 @@
+from odoo import fields, models, api, _
+from collections import defaultdict
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Measures of a snapshot row, summed by the dashboards and reversed together
+_KPI_MEASURES = ['cost_amount', 'revenue', 'irrigation_hours', 'report_count', 'yield_qty']
+
+# Pre-commit data key of the sales orders whose revenue rows must be synced
+_SALE_SYNC_KEY = 'farm_management.kpi_sale_sync'
+
+# Sales order states counted as project revenue
+_REVENUE_STATES = ('sale', 'done')
+
+
+class FarmProjectKpi(models.Model):
+    """Snapshot of the figures of cultivation projects, for the dashboards.
+
+    Rows are appended when a report is done, a sale is confirmed or a harvest
+    is received, and reversed with negative rows when these events are undone.
+    Revenue rows are re-recorded when the total of a confirmed order changes.
+    Dashboards group this narrow table instead of recomputing projects.
+    """
+    _name = 'farm.project.kpi'
+    _description = 'Cultivation Project KPI Snapshot'
+    _order = 'date desc, id desc'
+
+    project_id = fields.Many2one('farm.cultivation.project', string='Cultivation Project',
+                                 required=True, index=True, ondelete='cascade', readonly=True)
+    date = fields.Date(string='Date', required=True, index=True, readonly=True)
+    event = fields.Selection([
+        ('report', 'Daily Report'),
+        ('sale', 'Sale'),
+        ('harvest', 'Harvest'),
+    ], string='Event', required=True, readonly=True)
+    cost_type = fields.Selection(selection='_get_cost_types', string='Cost Type', readonly=True)
+
+    # Dimensions copied from the project when the row is written
+    company_id = fields.Many2one('res.company', string='Company', index=True, readonly=True)
+    currency_id = fields.Many2one('res.currency', related='company_id.currency_id')
+    farm_id = fields.Many2one('farm.farm', string='Farm', readonly=True)
+    field_id = fields.Many2one('farm.field', string='Field', readonly=True)
+    crop_id = fields.Many2one('farm.crop', string='Crop', readonly=True)
+
+    # Source documents, used to reverse their rows
+    report_id = fields.Many2one('farm.daily.report', string='Daily Report',
+                                index='btree_not_null', ondelete='set null', readonly=True)
+    sale_order_id = fields.Many2one('sale.order', string='Sales Order',
+                                    index='btree_not_null', ondelete='set null', readonly=True)
+
+    # Measures
+    cost_amount = fields.Monetary(string='Cost', currency_field='currency_id', readonly=True)
+    revenue = fields.Monetary(string='Revenue', currency_field='currency_id', readonly=True)
+    irrigation_hours = fields.Float(string='Irrigation Hours', readonly=True)
+    report_count = fields.Integer(string='Reports', readonly=True)
+    yield_qty = fields.Float(string='Yield', readonly=True)
+
+    def _get_cost_types(self):
+        """Return the farm cost types of product categories"""
+        return self.env['product.category']._fields['farm_cost_type']._description_selection(self.env)
+
+    @api.model
+    def _prepare_row(self, project, date, event, **values):
+        """Return the values of a snapshot row of project"""
+        return {
+            'project_id': project.id,
+            'date': date,
+            'event': event,
+            'company_id': project.company_id.id,
+            'farm_id': project.farm_id.id,
+            'field_id': project.field_id.id,
+            'crop_id': project.crop_id.id,
+            **values,
+        }
+
+    @api.model
+    def _record_reports(self, reports):
+        """Add the rows of reports that are done: their cost per cost type, hours and count"""
+        if not reports:
+            return self.browse()
+        costs = defaultdict(float)
+        for report, product, cost in self.env['farm.daily.report.line']._read_group(
+            [('report_id', 'in', reports.ids)],
+            groupby=['report_id', 'product_id'],
+            aggregates=['actual_cost:sum'],
+        ):
+            costs[(report.id, product.farm_cost_type or 'other')] += cost
+
+        vals_list = []
+        for report in reports:
+            vals_list.append(self._prepare_row(
+                report.project_id, report.date, 'report', report_id=report.id, report_count=1,
+                irrigation_hours=report.irrigation_duration if report.operation_type == 'irrigation' else 0.0,
+            ))
+        for (report_id, cost_type), cost in costs.items():
+            report = reports.browse(report_id)
+            vals_list.append(self._prepare_row(
+                report.project_id, report.date, 'report', report_id=report_id,
+                cost_type=cost_type, cost_amount=cost,
+            ))
+        return self.sudo().create(vals_list)
+
+    @api.model
+    def _record_sales(self, orders):
+        """Add the revenue rows of confirmed sales orders of projects"""
+        # Sales users confirming an order may not have access to the project
+        orders = orders.sudo().filtered('cultivation_project_id')
+        return self.sudo().create([
+            self._prepare_row(
+                order.cultivation_project_id, order.date_order.date(), 'sale',
+                sale_order_id=order.id, revenue=order.amount_total,
+            )
+            for order in orders
+        ])
+
+    @api.model
+    def _record_harvests(self, projects):
+        """Add the yield rows of projects whose harvest was received"""
+        today = fields.Date.context_today(self)
+        return self.sudo().create([
+            self._prepare_row(project, project.actual_end_date or today, 'harvest', yield_qty=project.actual_yield)
+            for project in projects.sudo().filtered('actual_yield')
+        ])
+
+    @api.model
+    def _defer_sale_sync(self, orders):
+        """Queue sales orders to have their revenue rows synced before the transaction commits"""
+        if not orders:
+            return
+        precommit = self.env.cr.precommit
+        pending_ids = precommit.data.get(_SALE_SYNC_KEY)
+        if pending_ids is None:
+            pending_ids = precommit.data[_SALE_SYNC_KEY] = set()
+            precommit.add(self._run_sale_sync)
+        pending_ids.update(orders.ids)
+
+    @api.model
+    def _run_sale_sync(self):
+        """Sync the revenue rows of the sales orders queued by the current transaction"""
+        order_ids = self.env.cr.precommit.data.pop(_SALE_SYNC_KEY, set())
+        self._sync_sales(self.env['sale.order'].sudo().browse(order_ids).exists())
+        # Pre-commit hooks run after the transaction was flushed
+        self.env.flush_all()
+
+    @api.model
+    def _sync_sales(self, orders):
+        """Re-record the revenue of orders whose rows no longer match their state, total or project"""
+        recorded = {
+            order.id: (project.id, revenue)
+            for order, project, revenue in self.sudo()._read_group(
+                [('sale_order_id', 'in', orders.ids)],
+                groupby=['sale_order_id', 'project_id'],
+                aggregates=['revenue:sum'],
+            )
+            if not order.currency_id.is_zero(revenue)
+        }
+        outdated = orders.browse()
+        for order in orders:
+            expected = (
+                (order.cultivation_project_id.id, order.amount_total)
+                if order.state in _REVENUE_STATES and order.cultivation_project_id else None
+            )
+            current = recorded.get(order.id)
+            if current is None and expected is None:
+                continue
+            if (current is None or expected is None or current[0] != expected[0]
+                    or order.currency_id.compare_amounts(current[1], expected[1])):
+                outdated |= order
+        if not outdated:
+            return
+        self._reverse([('sale_order_id', 'in', outdated.ids)])
+        self._record_sales(outdated.filtered(lambda o: o.state in _REVENUE_STATES))
+
+    @api.model
+    def _reverse(self, domain):
+        """Cancel the rows matching domain with negative rows on the same dates"""
+        groupby = ['project_id', 'date:day', 'event', 'cost_type', 'report_id', 'sale_order_id']
+        vals_list = []
+        for project, date, event, cost_type, report, order, *totals in self.sudo()._read_group(
+            domain, groupby=groupby, aggregates=[f'{measure}:sum' for measure in _KPI_MEASURES],
+        ):
+            if not any(totals):
+                continue
+            vals_list.append(self._prepare_row(
+                project, date, event, cost_type=cost_type, report_id=report.id, sale_order_id=order.id,
+                **{measure: -total for measure, total in zip(_KPI_MEASURES, totals)},
+            ))
+        return self.sudo().create(vals_list)
+
+    @api.model
+    def _init_snapshots(self):
+        """Build the snapshots on install, or on update when the table is still empty"""
+        if not self.sudo().search_count([], limit=1):
+            self._rebuild()
+
+    @api.model
+    def _rebuild(self):
+        """Rebuild all snapshots from the current documents, e.g. when installing the module"""
+        self.sudo().search([]).unlink()
+        self._record_reports(self.env['farm.daily.report'].search([('state', '=', 'done')]))
+        self._record_sales(self.env['sale.order'].search([
+            ('cultivation_project_id', '!=', False),
+            ('state', 'in', _REVENUE_STATES),
+        ]))
+        self._record_harvests(self.env['farm.cultivation.project'].search([('state', 'in', ['sales', 'done'])]))
+        _logger.info("Rebuilt the cultivation project KPI snapshots")
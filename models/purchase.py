@@ -0,0 +1,149 @@
+from odoo import fields, models, api, _
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class FarmServicePoLine(models.Model):
+    """Index of the open purchase order lines usable on labor/machinery report lines.
+
+    Rows are rebuilt whenever a purchase order, one of its lines, the
+    classification of its products or a daily report consuming it changes or
+    is deleted, so report lines can find their products and
+    purchase orders with indexed lookups instead of searching all orders.
+    """
+    _name = 'farm.service.po.line'
+    _description = 'Open Labor/Machinery Purchase Order Line'
+    _order = 'product_id, order_id'
+
+    purchase_line_id = fields.Many2one('purchase.order.line', string='Purchase Order Line',
+                                       required=True, index=True, ondelete='cascade', readonly=True)
+    order_id = fields.Many2one('purchase.order', string='Purchase Order',
+                               required=True, index=True, ondelete='cascade', readonly=True)
+    product_id = fields.Many2one('product.product', string='Product',
+                                 required=True, index=True, ondelete='cascade', readonly=True)
+    vendor_id = fields.Many2one('res.partner', string='Vendor', index=True, readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', index=True, readonly=True)
+    product_qty = fields.Float(string='Ordered Quantity', readonly=True)
+    qty_consumed = fields.Float(string='Consumed Quantity', readonly=True,
+                                help='Quantity used on confirmed daily reports')
+    remaining_qty = fields.Float(string='Remaining Quantity', readonly=True)
+
+    _sql_constraints = [
+        ('purchase_line_unique', 'unique(purchase_line_id)',
+         'A purchase order line can only be indexed once.'),
+    ]
+
+    @api.model
+    def _is_open_service_line(self, po_line):
+        """Return whether a purchase order line can be used on labor/machinery report lines"""
+        return (
+            not po_line.display_type
+            and po_line.product_id
+            and po_line.order_id.state in ('purchase', 'to approve')
+            and po_line.product_id.farm_line_type == 'labor_machinery'
+        )
+
+    @api.model
+    def _refresh(self, po_lines):
+        """Rebuild the index rows of the given purchase order lines"""
+        po_lines = po_lines.sudo().exists()
+        index = self.sudo()
+        index.search([('purchase_line_id', 'in', po_lines.ids)]).unlink()
+
+        open_lines = po_lines.filtered(self._is_open_service_line)
+        if not open_lines:
+            return index
+        consumed = dict(self.env['farm.daily.report.line'].sudo()._read_group(
+            [('purchase_order_line_id', 'in', open_lines.ids),
+             ('report_id.state', 'in', ('confirming', 'confirmed', 'done'))],
+            groupby=['purchase_order_line_id'],
+            aggregates=['quantity:sum'],
+        ))
+        return index.create([{
+            'purchase_line_id': po_line.id,
+            'order_id': po_line.order_id.id,
+            'product_id': po_line.product_id.id,
+            'vendor_id': po_line.order_id.partner_id.id,
+            'company_id': po_line.order_id.company_id.id,
+            'product_qty': po_line.product_qty,
+            'qty_consumed': consumed.get(po_line, 0.0),
+            'remaining_qty': po_line.product_qty - consumed.get(po_line, 0.0),
+        } for po_line in open_lines])
+
+    @api.model
+    def _refresh_open_lines(self, domain):
+        """Rebuild the index rows of the lines of open purchase orders matching domain"""
+        po_lines = self.env['purchase.order.line'].sudo().search(
+            domain + [('order_id.state', 'in', ('purchase', 'to approve'))]
+        )
+        return self._refresh(po_lines)
+
+    @api.model
+    def _rebuild_index(self):
+        """Rebuild the whole index, e.g. after installing or updating the module"""
+        self.sudo().search([]).unlink()
+        po_lines = self.env['purchase.order.line'].sudo().search([
+            ('order_id.state', 'in', ('purchase', 'to approve')),
+            ('display_type', '=', False),
+        ])
+        rows = self._refresh(po_lines)
+        _logger.info("Indexed %s open labor/machinery purchase order lines", len(rows))
+
+    @api.model
+    def _get_available_products(self):
+        """Return the products that have open labor/machinery purchase order lines left to consume"""
+        return self.env['product.product'].concat(*(
+            product for [product] in self._read_group(
+                [('company_id', 'in', self.env.companies.ids), ('remaining_qty', '>', 0)],
+                groupby=['product_id'],
+            )
+        ))
+
+    @api.model
+    def _get_orders_by_product(self, products):
+        """Return {product id: purchase orders with quantity left on open lines for the product}"""
+        return {
+            product.id: orders
+            for product, orders in self._read_group(
+                [('product_id', 'in', products.ids), ('company_id', 'in', self.env.companies.ids),
+                 ('remaining_qty', '>', 0)],
+                groupby=['product_id'],
+                aggregates=['order_id:recordset'],
+            )
+        }
+
+
+class PurchaseOrder(models.Model):
+    _inherit = 'purchase.order'
+
+    # Fields that decide whether the lines of an order are indexed
+    _FARM_INDEX_FIELDS = {'state', 'partner_id', 'company_id'}
+
+    def write(self, vals):
+        """Keep the labor/machinery purchase line index up to date"""
+        result = super().write(vals)
+        if self._FARM_INDEX_FIELDS.intersection(vals):
+            self.env['farm.service.po.line']._refresh(self.order_line)
+        return result
+
+
+class PurchaseOrderLine(models.Model):
+    _inherit = 'purchase.order.line'
+
+    # Fields that change the indexed data of a line
+    _FARM_INDEX_FIELDS = {'product_id', 'product_qty', 'product_uom_qty', 'display_type', 'order_id'}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Index new lines of open labor/machinery purchase orders"""
+        lines = super().create(vals_list)
+        self.env['farm.service.po.line']._refresh(lines)
+        return lines
+
+    def write(self, vals):
+        """Keep the labor/machinery purchase line index up to date"""
+        result = super().write(vals)
+        if self._FARM_INDEX_FIELDS.intersection(vals):
+            self.env['farm.service.po.line']._refresh(self)
+        return result
@@ -0,0 +1,121 @@
+from odoo import models, api
+from .farm_perf_sample import instrumented
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Pre-commit data key of the reports queued for reconciliation
+_PENDING_KEY = 'farm_management.report_reconciliation'
+
+
+class FarmReportReconciler(models.AbstractModel):
+    """Complete the daily reports whose stock moves have all been validated.
+
+    Picking validation only queues the affected reports; they are reconciled
+    once per transaction, right before commit. Reconciliation is idempotent:
+    only confirmed reports are locked and completed, and analytic entries are
+    only created for reports that have none, so running it again, e.g. from
+    the repair cron, is harmless.
+    """
+    _name = 'farm.report.reconciler'
+    _description = 'Farm Daily Report Completion Reconciler'
+
+    @api.model
+    def _get_reports(self, records):
+        """Return the daily reports of pickings, stock moves or reports"""
+        if records._name == 'farm.daily.report':
+            return records
+        if records._name == 'stock.picking':
+            records = records.move_ids
+        return records.daily_report_id
+
+    @api.model
+    def _defer(self, records):
+        """Queue the reports of records to be reconciled before the transaction commits"""
+        report_ids = self._get_reports(records).ids
+        if not report_ids:
+            return
+        precommit = self.env.cr.precommit
+        pending_ids = precommit.data.get(_PENDING_KEY)
+        if pending_ids is None:
+            pending_ids = precommit.data[_PENDING_KEY] = set()
+            precommit.add(self._run_deferred)
+        pending_ids.update(report_ids)
+
+    @api.model
+    def _run_deferred(self):
+        """Reconcile the reports queued by the current transaction"""
+        report_ids = self.env.cr.precommit.data.pop(_PENDING_KEY, set())
+        self._reconcile(self.env['farm.daily.report'].browse(report_ids))
+        # Pre-commit hooks run after the transaction was flushed
+        self.env.flush_all()
+
+    @api.model
+    @instrumented
+    def _reconcile(self, records):
+        """Complete the reports of records whose consumable moves are all done.
+
+        Returns the reports that were completed.
+        """
+        reports = self._lock_confirmed_reports(self._get_reports(records).exists())
+        pending_ids = self._get_reports_with_pending_moves(reports)
+        completed = reports.filtered(lambda r: r.id not in pending_ids)
+        if not completed:
+            return completed
+        _logger.debug("Setting daily reports %s to 'done' due to stock move validation", completed.ids)
+        completed.with_context(force_write=True).write({'state': 'done'})
+        # Create analytic entries with updated costs, once per report
+        completed.filtered(lambda r: not r.analytic_line_ids)._create_analytic_entries()
+        return completed
+
+    @api.model
+    def _lock_confirmed_reports(self, reports):
+        """Lock the confirmed reports among reports, skipping those locked by another transaction"""
+        if not reports:
+            return reports
+        reports.flush_recordset(['state'])
+        self.env.cr.execute("""
+            SELECT id
+              FROM farm_daily_report
+             WHERE id IN %s
+               AND state = 'confirmed'
+               FOR UPDATE SKIP LOCKED
+        """, [tuple(reports.ids)])
+        locked_ids = [row[0] for row in self.env.cr.fetchall()]
+        # Another transaction may have completed them since they were read
+        reports.invalidate_recordset(['state', 'analytic_line_ids'])
+        return reports.browse(locked_ids)
+
+    @api.model
+    def _get_reports_with_pending_moves(self, reports):
+        """Return the ids of the reports that still have consumable moves not done.
+
+        Uses a single aggregate query for all reports.
+        """
+        if not reports:
+            return set()
+        self.env['stock.move'].flush_model(['daily_report_id', 'state', 'product_id'])
+        self.env['product.product'].flush_model(['product_tmpl_id'])
+        self.env['product.template'].flush_model(['type'])
+        self.env.cr.execute("""
+            SELECT move.daily_report_id
+              FROM stock_move move
+              JOIN product_product product ON product.id = move.product_id
+              JOIN product_template template ON template.id = product.product_tmpl_id
+             WHERE move.daily_report_id IN %s
+               AND template.type = 'consu'
+             GROUP BY move.daily_report_id
+            HAVING bool_or(move.state != 'done')
+        """, [tuple(reports.ids)])
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _cron_reconcile_reports(self):
+        """Repair the confirmed reports left incomplete by interrupted validations"""
+        reports = self.env['farm.daily.report'].search([
+            ('state', '=', 'confirmed'),
+            ('stock_move_ids.state', '=', 'done'),
+        ])
+        completed = self._reconcile(reports)
+        if completed:
+            _logger.info("Completed %s daily reports missed by stock validation", len(completed))
@@ -17,3 +17,59 @@ class ResConfigSettings(models.TransientModel):
         config_parameter='farm_management.machinery_expense_account_id',
         domain=[('account_type', '=', 'expense')]
     )
+    
+    # Vendor billing of labor and machinery lines
+    farm_billing_mode = fields.Selection([
+        ('per_report', 'One bill per report'),
+        ('consolidated', 'One bill per billing period'),
+    ], string='Service Billing',
+        config_parameter='farm_management.billing_mode',
+        default='per_report'
+    )
+    
+    farm_billing_period = fields.Selection([
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ], string='Billing Period',
+        config_parameter='farm_management.billing_period',
+        default='month'
+    )
+    
+    # Valuation of consumed inputs
+    farm_cost_strategy_order = fields.Char(
+        string='Cost Strategy Order',
+        config_parameter='farm_management.cost_strategy_order',
+        default='account_moves,valuation_layers,move_price,standard_price',
+        help='Comma-separated order in which the cost of consumed stock moves is resolved: '
+             'account_moves, valuation_layers, move_price, standard_price'
+    )
+    
+    # Performance instrumentation
+    farm_perf_instrumentation = fields.Boolean(
+        string='Performance Instrumentation',
+        config_parameter='farm_management.perf_instrumentation'
+    )
+    
+    # Background processing
+    farm_async_confirmation = fields.Boolean(
+        string='Confirm Daily Reports in Background',
+        config_parameter='farm_management.async_confirmation'
+    )
+    
+    farm_job_batch_size = fields.Integer(
+        string='Jobs per Run',
+        config_parameter='farm_management.job_batch_size',
+        default=20
+    )
+    
+    farm_job_max_attempts = fields.Integer(
+        string='Attempts per Job',
+        config_parameter='farm_management.job_max_attempts',
+        default=3
+    )
+    
+    # Harvest stock notifications
+    farm_harvest_notice_digest = fields.Boolean(
+        string='Harvest Notes Digest',
+        config_parameter='farm_management.harvest_notice_digest'
+    )
@@ -17,3 +17,37 @@ class SaleOrder(models.Model):
         if self.cultivation_project_id:
             return _("Cultivation Project: %s") % self.cultivation_project_id.name
         return ""
+
+    def write(self, vals):
+        """Keep the revenue of the cultivation project KPI snapshots up to date"""
+        result = super().write(vals)
+        if {'state', 'cultivation_project_id'}.intersection(vals):
+            self.env['farm.project.kpi']._defer_sale_sync(self)
+        return result
+
+
+class SaleOrderLine(models.Model):
+    _inherit = 'sale.order.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Resync the project revenue of confirmed orders when lines are added"""
+        lines = super().create(vals_list)
+        lines._defer_project_revenue_sync()
+        return lines
+
+    def write(self, vals):
+        """Resync the project revenue of confirmed orders when their lines change"""
+        result = super().write(vals)
+        self._defer_project_revenue_sync()
+        return result
+
+    def unlink(self):
+        """Resync the project revenue of confirmed orders when lines are removed"""
+        self._defer_project_revenue_sync()
+        return super().unlink()
+
+    def _defer_project_revenue_sync(self):
+        """Queue the confirmed project orders of the lines for a revenue sync"""
+        orders = self.order_id.filtered(lambda o: o.cultivation_project_id and o.state in ('sale', 'done'))
+        self.env['farm.project.kpi']._defer_sale_sync(orders)
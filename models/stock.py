@@ -1,4 +1,9 @@
-from odoo import fields, models, api, _
+from odoo import fields, models, api, tools, _
+from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index
+from .farm_perf_sample import instrumented
+from bisect import bisect_right
+from collections import defaultdict
 import logging
 from datetime import datetime
 
@@ -10,6 +15,14 @@ class StockMove(models.Model):
     daily_report_id = fields.Many2one('farm.daily.report', string='Daily Report', 
                                     index=True, ondelete='set null')
 
+    def init(self):
+        """Index the done farm moves by product and date for the farm usage refresh"""
+        create_index(
+            self.env.cr, 'stock_move_farm_usage_index', self._table,
+            ['product_id', 'date'],
+            where="daily_report_id IS NOT NULL AND state = 'done'",
+        )
+
 class StockMoveLine(models.Model):
     _inherit = 'stock.move.line'
     
@@ -19,21 +32,45 @@ class StockMoveLine(models.Model):
 class ProductProduct(models.Model):
     _inherit = 'product.product'
     
-    is_used_in_farm = fields.Boolean(string='Used in Farm', compute='_compute_farm_usage', store=True)
-    last_farm_usage_date = fields.Date(string='Last Farm Usage', compute='_compute_farm_usage', store=True)
+    # Maintained by _update_farm_usage when farm moves are done, not computed
+    is_used_in_farm = fields.Boolean(string='Used in Farm', readonly=True)
+    last_farm_usage_date = fields.Date(string='Last Farm Usage', readonly=True)
     
-    @api.depends('stock_move_ids.daily_report_id')
-    def _compute_farm_usage(self):
-        """Compute if product is used in farm operations and the last usage date"""
-        for product in self:
-            farm_moves = self.env['stock.move'].search([
-                ('product_id', '=', product.id),
-                ('daily_report_id', '!=', False),
-                ('state', '=', 'done')
-            ], order='date desc', limit=1)
-            
-            product.is_used_in_farm = bool(farm_moves)
-            product.last_farm_usage_date = farm_moves.date.date() if farm_moves else False
+    @instrumented
+    def _update_farm_usage(self):
+        """Update if products are used in farm operations and their last usage date.
+
+        Uses one grouped query on the done farm moves of all products and only
+        writes the rows whose values changed.
+        """
+        if not self:
+            return
+        self.env['stock.move'].flush_model(['product_id', 'daily_report_id', 'state', 'date'])
+        self.flush_recordset(['is_used_in_farm', 'last_farm_usage_date'])
+        self.env.cr.execute("""
+            UPDATE product_product product
+               SET is_used_in_farm = usage.last_date IS NOT NULL,
+                   last_farm_usage_date = usage.last_date
+              FROM (
+                    SELECT p.id AS product_id, MAX(move.date)::date AS last_date
+                      FROM product_product p
+                 LEFT JOIN stock_move move
+                        ON move.product_id = p.id
+                       AND move.daily_report_id IS NOT NULL
+                       AND move.state = 'done'
+                     WHERE p.id IN %s
+                  GROUP BY p.id
+                   ) usage
+             WHERE product.id = usage.product_id
+               AND (product.is_used_in_farm IS DISTINCT FROM (usage.last_date IS NOT NULL)
+                    OR product.last_farm_usage_date IS DISTINCT FROM usage.last_date)
+        """, [tuple(self.ids)])
+        self.invalidate_recordset(['is_used_in_farm', 'last_farm_usage_date'])
+
+    @api.model
+    def _cron_update_farm_usage(self):
+        """Reconcile the farm usage of the whole catalog"""
+        self.with_context(active_test=False).search([])._update_farm_usage()
 
 class AccountAnalyticLine(models.Model):
     _inherit = 'account.analytic.line'
@@ -41,37 +78,260 @@ class AccountAnalyticLine(models.Model):
     daily_report_id = fields.Many2one('farm.daily.report', string='Daily Report', 
                                     index=True, ondelete='cascade')
 
-class StockPicking(models.Model):
-    _inherit = 'stock.picking'
-    
-    def button_validate(self):
-        """Override button_validate to update daily report state when picking is done."""
-        result = super(StockPicking, self).button_validate()
-        
-        # After validation, update daily reports
-        daily_report_pickings = self.filtered(
-            lambda p: p.move_ids.filtered(lambda m: hasattr(m, 'daily_report_id') and m.daily_report_id)
-        )
-        
-        for picking in daily_report_pickings:
-            if picking.state == 'done':
-                # Collect all daily reports from the moves
-                daily_reports = self.env['farm.daily.report']
-                for move in picking.move_ids:
-                    if hasattr(move, 'daily_report_id') and move.daily_report_id:
-                        daily_reports |= move.daily_report_id
-                
-                # Update daily report states and create analytic entries
-                for report in daily_reports:
-                    if report.state == 'confirmed':
-                        stockable_moves = self.env['stock.move'].search([
-                            ('daily_report_id', '=', report.id),
-                            ('product_id.type', 'in', ['product', 'consu'])
-                        ])
-                        
-                        if not stockable_moves or all(m.state == 'done' for m in stockable_moves):
-                            report.state = 'done'
-                            if not report.analytic_line_ids:
-                                report._create_analytic_entries()
-        
+class StockWarehouse(models.Model):
+    _inherit = 'stock.warehouse'
+
+    # Fields that decide the cached farm warehouse and picking types
+    _FARM_CACHE_FIELDS = {'company_id', 'active', 'sequence', 'in_type_id', 'out_type_id'}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Drop cached farm warehouses and picking types when a warehouse is added"""
+        warehouses = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return warehouses
+
+    def write(self, vals):
+        """Drop cached farm warehouses and picking types when their resolution changes"""
+        result = super().write(vals)
+        if self._FARM_CACHE_FIELDS.intersection(vals):
+            self.env.registry.clear_cache()
+        return result
+
+    def unlink(self):
+        """Drop cached farm warehouses and picking types when a warehouse is removed"""
+        result = super().unlink()
+        self.env.registry.clear_cache()
+        return result
+
+    @api.model
+    @tools.ormcache('company_id')
+    def _get_farm_warehouse_id(self, company_id):
+        """Return the id of the warehouse used by farm operations of a company (cached per company).
+
+        Searched as superuser so that the cached id does not depend on the calling user.
+        """
+        warehouses = self.sudo().with_context(active_test=True)
+        return warehouses.search([('company_id', '=', company_id)], limit=1).id
+
+    @api.model
+    def _get_farm_warehouse(self, company_id):
+        """Return the warehouse used by farm operations of a company"""
+        warehouse = self.browse(self._get_farm_warehouse_id(company_id))
+        if not warehouse:
+            raise ValidationError(_("No warehouse found for this company."))
+        return warehouse
+
+    @api.model
+    def _get_farm_stock_location(self, company_id):
+        """Return the stock location farm inputs are taken from and harvests are received in"""
+        warehouse = self._get_farm_warehouse(company_id)
+        stock_location = warehouse.lot_stock_id
+        if not stock_location:
+            stock_location = self.env.ref('stock.stock_location_stock', raise_if_not_found=False)
+            if not stock_location:
+                stock_location = self.env['stock.location'].search([
+                    ('usage', '=', 'internal'),
+                    ('company_id', '=', company_id),
+                    ('name', 'ilike', 'Stock')
+                ], limit=1)
+
+        if not stock_location:
+            raise ValidationError(_("No stock location found in warehouse."))
+        return stock_location
+
+
+class StockPickingType(models.Model):
+    _inherit = 'stock.picking.type'
+
+    # Fields that decide the cached farm picking types
+    _FARM_CACHE_FIELDS = {'code', 'warehouse_id', 'company_id', 'active', 'sequence'}
+
+    # Farm operations and the warehouse operation type backing them
+    _FARM_OPERATIONS = {
+        'consumption': {
+            'code': 'outgoing',
+            'warehouse_field': 'out_type_id',
+            'name': 'Farm Operations',
+            'sequence_code': 'OUT',
+            'sequence_name': 'Stock Outgoing',
+            'sequence_ir_code': 'stock.picking.out',
+            'sequence_prefix': 'WH/OUT/',
+        },
+        'harvest': {
+            'code': 'incoming',
+            'warehouse_field': 'in_type_id',
+            'name': 'Harvest Receipts',
+            'sequence_code': 'IN',
+            'sequence_name': 'Stock Incoming',
+            'sequence_ir_code': 'stock.picking.in',
+            'sequence_prefix': 'WH/IN/',
+        },
+    }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Drop cached farm picking types when an operation type is added"""
+        picking_types = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return picking_types
+
+    def write(self, vals):
+        """Drop cached farm picking types when their resolution changes"""
+        result = super().write(vals)
+        if self._FARM_CACHE_FIELDS.intersection(vals):
+            self.env.registry.clear_cache()
         return result
+
+    def unlink(self):
+        """Drop cached farm picking types when an operation type is removed"""
+        result = super().unlink()
+        self.env.registry.clear_cache()
+        return result
+
+    @api.model
+    @tools.ormcache('company_id', 'operation')
+    def _get_farm_picking_type_id(self, company_id, operation):
+        """Return the id of the existing picking type used for a farm operation
+        ('consumption' or 'harvest') of a company, cached per company.
+
+        Resolved as superuser so that the cached id does not depend on the calling user.
+        """
+        config = self._FARM_OPERATIONS[operation]
+        picking_types = self.sudo().with_context(active_test=True)
+        warehouse = self.env['stock.warehouse'].sudo()._get_farm_warehouse(company_id)
+        picking_type = warehouse[config['warehouse_field']]
+        if not picking_type:
+            # Fall back to any picking type of the same kind
+            picking_type = picking_types.search([
+                ('code', '=', config['code']),
+                ('warehouse_id', '=', warehouse.id)
+            ], limit=1)
+        return picking_type.id
+
+    @api.model
+    def _get_farm_picking_type(self, company_id, operation, farm_location):
+        """Return the picking type used for a farm operation of a company.
+
+        The picking type is created on first use when the warehouse has none,
+        with ``farm_location`` as its farm-side default location.
+        """
+        picking_type = self.browse(self._get_farm_picking_type_id(company_id, operation))
+        if picking_type:
+            return picking_type
+
+        config = self._FARM_OPERATIONS[operation]
+        warehouse = self.env['stock.warehouse']._get_farm_warehouse(company_id)
+        stock_location = self.env['stock.warehouse']._get_farm_stock_location(company_id)
+
+        # Use standard sequence format (WH/OUT/000, WH/IN/000) but with farm-specific default locations
+        sequence = self.env['ir.sequence'].search([
+            ('code', '=', config['sequence_ir_code']),
+            ('company_id', '=', company_id)
+        ], limit=1)
+
+        if not sequence:
+            sequence = self.env['ir.sequence'].create({
+                'name': config['sequence_name'],
+                'code': config['sequence_ir_code'],
+                'prefix': config['sequence_prefix'],
+                'padding': 5,
+                'company_id': company_id,
+            })
+
+        if config['code'] == 'outgoing':
+            # From warehouse stock to the farm-specific location
+            source_location, dest_location = stock_location, farm_location
+        else:
+            # From the farm-specific location to warehouse stock
+            source_location, dest_location = farm_location, stock_location
+
+        return self.create({
+            'name': config['name'],
+            'code': config['code'],
+            'sequence_code': config['sequence_code'],
+            'default_location_src_id': source_location.id,
+            'default_location_dest_id': dest_location.id,
+            'sequence_id': sequence.id,
+            'warehouse_id': warehouse.id,
+            'company_id': company_id,
+        })
+
+
+class FarmStockForecast(models.AbstractModel):
+    """Projected stock curves of consumable products.
+
+    A curve starts from the on-hand quantity of a (company, product) and adds,
+    per day, the pending incoming and outgoing moves and the consumption of the
+    daily reports that have no stock moves yet.
+    """
+    _name = 'farm.stock.forecast'
+    _description = 'Farm Stock Forecast'
+
+    @api.model
+    def _build_curves(self, company_id, products, exclude_lines=None):
+        """Build the projected stock curves of products in a company.
+
+        Args:
+            company_id: company whose warehouses are projected
+            products: product.product recordset
+            exclude_lines: report lines whose consumption is left out of the curves
+
+        Returns:
+            dict: product id -> (on-hand quantity, sorted dates, cumulative deltas)
+        """
+        products = products.with_company(company_id)
+        quantities = products._compute_quantities_dict(False, False, False)
+        deltas = {product.id: defaultdict(float) for product in products}
+
+        # Pending moves, using the same location domains as the standard forecast
+        dummy, domain_move_in_loc, domain_move_out_loc = products._get_domain_locations()
+        todo_domain = [
+            ('product_id', 'in', products.ids),
+            ('state', 'in', ('waiting', 'confirmed', 'assigned', 'partially_available')),
+        ]
+        for move_domain, sign in ((domain_move_in_loc, 1), (domain_move_out_loc, -1)):
+            for product, day, quantity in self.env['stock.move'].with_company(company_id)._read_group(
+                todo_domain + move_domain,
+                groupby=['product_id', 'date:day'],
+                aggregates=['product_qty:sum'],
+            ):
+                deltas[product.id][self._to_date(day)] += sign * quantity
+
+        # Reports that will consume stock but have no moves yet
+        line_domain = [
+            ('product_id', 'in', products.ids),
+            ('report_id.company_id', '=', company_id),
+            ('report_id.state', 'in', ('draft', 'confirming')),
+        ]
+        if exclude_lines:
+            line_domain.append(('id', 'not in', exclude_lines.ids))
+        for product, report, quantity in self.env['farm.daily.report.line']._read_group(
+            line_domain,
+            groupby=['product_id', 'report_id'],
+            aggregates=['quantity:sum'],
+        ):
+            deltas[product.id][report.date or fields.Date.today()] -= quantity
+
+        curves = {}
+        for product in products:
+            dates = sorted(deltas[product.id])
+            cumulative = []
+            total = 0.0
+            for day in dates:
+                total += deltas[product.id][day]
+                cumulative.append(total)
+            curves[product.id] = (quantities[product.id]['qty_available'], dates, cumulative)
+        return curves
+
+    @api.model
+    def _get_projected_quantity(self, curve, day):
+        """Return the projected stock of a curve at the end of day"""
+        on_hand, dates, cumulative = curve
+        index = bisect_right(dates, day)
+        return on_hand + (cumulative[index - 1] if index else 0.0)
+
+    @api.model
+    def _to_date(self, value):
+        """Return the date of a grouped day value"""
+        return value.date() if isinstance(value, datetime) else value
@@ -0,0 +1,3 @@
+from . import test_line_forecast
+from . import test_product_category
+from . import test_service_po_index
@@ -0,0 +1,61 @@
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestLineForecast(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.product = cls.env['product.product'].create({
+            'name': 'Urea 46%',
+            'type': 'consu',
+            'is_storable': True,
+        })
+        farm = cls.env['farm.farm'].create({'name': 'South Farm', 'area': 50.0})
+        field = cls.env['farm.field'].create({'name': 'Plot 2', 'farm_id': farm.id, 'area': 5.0})
+        crop = cls.env['farm.crop'].create({'name': 'Maize'})
+        project = cls.env['farm.cultivation.project'].create({
+            'name': 'Maize Season',
+            'farm_id': farm.id,
+            'field_id': field.id,
+            'crop_id': crop.id,
+            'start_date': fields.Date.today(),
+            'planned_end_date': fields.Date.add(fields.Date.today(), days=90),
+        })
+        cls.company = project.company_id
+        cls.stock_location = cls.env['stock.warehouse']._get_farm_stock_location(cls.company.id)
+        cls.env['stock.quant']._update_available_quantity(cls.product, cls.stock_location, 10.0)
+
+        cls.report = cls.env['farm.daily.report'].create({
+            'project_id': project.id,
+            'operation_type': 'fertilizer',
+            'irrigation_duration': 0.0,
+            'other_product_lines': [(0, 0, {
+                'line_type': 'other',
+                'product_id': cls.product.id,
+                'quantity': 8.0,
+            })],
+        })
+        cls.line = cls.report.other_product_lines
+
+    def test_new_move_invalidates_forecast(self):
+        [values] = self.line._evaluate()
+        self.assertFalse(values['forecasted_issue'])
+
+        move = self.env['stock.move'].create({
+            'name': 'Urea delivery',
+            'product_id': self.product.id,
+            'product_uom_qty': 5.0,
+            'product_uom': self.product.uom_id.id,
+            'location_id': self.stock_location.id,
+            'location_dest_id': self.env.ref('stock.stock_location_customers').id,
+            'company_id': self.company.id,
+            'date': fields.Datetime.now(),
+        })
+        move._action_confirm()
+
+        # Evaluated again within the cache lifetime: the pending delivery is projected
+        [values] = self.line._evaluate()
+        self.assertTrue(values['forecasted_issue'])
@@ -0,0 +1,54 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestProductCategoryClassification(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Category = cls.env['product.category']
+        cls.fertilizers = Category.create({'name': 'Fertilizers', 'farm_cost_type_manual': 'fertilizer'})
+        cls.water = Category.create({'name': 'Water', 'farm_cost_type_manual': 'water'})
+        cls.organic = Category.create({'name': 'Organic', 'parent_id': cls.fertilizers.id})
+        cls.compost = Category.create({'name': 'Compost', 'parent_id': cls.organic.id})
+        cls.seeds = Category.create({
+            'name': 'Seed Coatings', 'parent_id': cls.fertilizers.id, 'farm_cost_type_manual': 'seeds',
+        })
+
+    def test_children_inherit_classification(self):
+        self.assertEqual(self.organic.farm_cost_type, 'fertilizer')
+        self.assertEqual(self.compost.farm_cost_type, 'fertilizer')
+        self.assertEqual(self.compost.farm_line_type, 'other')
+        self.assertEqual(self.seeds.farm_cost_type, 'seeds')
+
+    def test_reclassify_parent(self):
+        self.fertilizers.farm_cost_type_manual = 'labor'
+        self.assertEqual(self.organic.farm_cost_type, 'labor')
+        self.assertEqual(self.compost.farm_cost_type, 'labor')
+        self.assertEqual(self.compost.farm_line_type, 'labor_machinery')
+        # Overrides are kept
+        self.assertEqual(self.seeds.farm_cost_type, 'seeds')
+
+        self.seeds.farm_cost_type_manual = False
+        self.assertEqual(self.seeds.farm_cost_type, 'labor')
+
+    def test_reparent_child(self):
+        self.organic.parent_id = self.water
+        self.assertEqual(self.organic.farm_cost_type, 'water')
+        self.assertEqual(self.compost.farm_cost_type, 'water')
+
+        self.organic.parent_id = False
+        self.assertFalse(self.organic.farm_cost_type)
+        self.assertFalse(self.compost.farm_cost_type)
+
+    def test_stored_classification_follows_parent(self):
+        self.fertilizers.farm_cost_type_manual = 'pesticide'
+        self.env.flush_all()
+        self.assertEqual(
+            self.env['product.category'].search([
+                ('id', 'child_of', self.fertilizers.id),
+                ('farm_cost_type', '=', 'pesticide'),
+            ]),
+            self.fertilizers | self.organic | self.compost,
+        )
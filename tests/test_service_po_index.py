@@ -0,0 +1,89 @@
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestServicePoIndex(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Category = cls.env['product.category']
+        cls.labor_category = Category.create({'name': 'Harvest Crews', 'farm_cost_type_manual': 'labor'})
+        cls.other_category = Category.create({'name': 'Sundries', 'farm_cost_type_manual': 'other'})
+        cls.vendor = cls.env['res.partner'].create({'name': 'Field Crew Contractor'})
+        cls.product = cls.env['product.product'].create({
+            'name': 'Picking Crew Day',
+            'type': 'service',
+            'categ_id': cls.labor_category.id,
+        })
+        cls.order = cls.env['purchase.order'].create({
+            'partner_id': cls.vendor.id,
+            'order_line': [(0, 0, {'product_id': cls.product.id, 'product_qty': 10.0, 'price_unit': 50.0})],
+        })
+        cls.order.button_confirm()
+        cls.po_line = cls.order.order_line
+
+        farm = cls.env['farm.farm'].create({'name': 'North Farm', 'area': 100.0})
+        field = cls.env['farm.field'].create({'name': 'Plot 1', 'farm_id': farm.id, 'area': 10.0})
+        crop = cls.env['farm.crop'].create({'name': 'Wheat'})
+        cls.project = cls.env['farm.cultivation.project'].create({
+            'name': 'Wheat Season',
+            'farm_id': farm.id,
+            'field_id': field.id,
+            'crop_id': crop.id,
+            'start_date': fields.Date.today(),
+            'planned_end_date': fields.Date.add(fields.Date.today(), days=120),
+        })
+
+    def _get_index_row(self):
+        return self.env['farm.service.po.line'].search([('purchase_line_id', '=', self.po_line.id)])
+
+    def _create_confirmed_report(self, quantity):
+        report = self.env['farm.daily.report'].create({
+            'project_id': self.project.id,
+            'operation_type': 'other',
+            'irrigation_duration': 0.0,
+            'labor_machinery_lines': [(0, 0, {
+                'line_type': 'labor_machinery',
+                'product_id': self.product.id,
+                'purchase_order_id': self.order.id,
+                'purchase_order_line_id': self.po_line.id,
+                'quantity': quantity,
+            })],
+        })
+        report.with_context(force_write=True).write({'state': 'confirmed'})
+        return report
+
+    def test_report_deletion_releases_quantity(self):
+        self.assertEqual(self._get_index_row().remaining_qty, 10.0)
+        report = self._create_confirmed_report(4.0)
+        self.assertEqual(self._get_index_row().remaining_qty, 6.0)
+
+        report.unlink()
+        self.assertEqual(self._get_index_row().remaining_qty, 10.0)
+
+    def test_report_line_deletion_releases_quantity(self):
+        report = self._create_confirmed_report(4.0)
+        self.assertEqual(self._get_index_row().remaining_qty, 6.0)
+
+        report.labor_machinery_lines.unlink()
+        self.assertEqual(self._get_index_row().remaining_qty, 10.0)
+
+    def test_product_reclassification(self):
+        self.assertTrue(self._get_index_row())
+        available = self.env['farm.service.po.line']._get_available_products()
+        self.assertIn(self.product, available)
+
+        self.product.product_tmpl_id.categ_id = self.other_category
+        self.assertFalse(self._get_index_row())
+
+        self.product.product_tmpl_id.categ_id = self.labor_category
+        self.assertEqual(self._get_index_row().remaining_qty, 10.0)
+
+    def test_category_reclassification(self):
+        self.labor_category.farm_cost_type_manual = 'fertilizer'
+        self.assertFalse(self._get_index_row())
+
+        self.labor_category.farm_cost_type_manual = 'machinery'
+        self.assertEqual(self._get_index_row().remaining_qty, 10.0)